@@ -1,5 +1,9 @@
-# boot.py -- run on boot-up
-# can run arbitrary Python, but best to keep it minimal
-
-
-
+# boot.py -- run on boot-up
+# can run arbitrary Python, but best to keep it minimal
+
+# main.py and helperFunctions.py are compiled on the board when they are
+# imported. Compile them like the *.mpy files (mpy-cross -O3): no assert
+# statements and no line number tables, which saves RAM. Set this back to 0
+# while debugging, so error messages show line numbers again.
+import micropython
+micropython.opt_level(3)
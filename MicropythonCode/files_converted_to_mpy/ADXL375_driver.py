@@ -16,6 +16,46 @@
 # 09.07.2019 - Added more bit masks/constants. Added more functions.
 # 03.05.2020 - Added functions to configure interrupts and FIFO buffer.
 # 06.11.2020 - Final comments added, code cleaned up
+# 10.15.2026 - Register access functions compiled with the native emitter
+# 10.15.2026 - Added function to read the FIFO buffer (viper decoding)
+# 10.15.2026 - CS pin toggled through the GPIO BSRR register (viper)
+# 10.15.2026 - Registers and bit masks moved to module level const()
+# 10.15.2026 - Configuration registers cached in RAM (shadow registers)
+# 10.15.2026 - Added begin_config()/end_config() to write the configuration
+#              registers in a single multi-byte write
+# 10.15.2026 - Command bytes of the fast path reads precomputed with const()
+# 10.15.2026 - FIFO samples read into two alternating raw buffers
+# 10.15.2026 - CS pin registers packed into one array (fewer attribute lookups)
+# 10.15.2026 - Added function to read X, Y and Z in a single transaction
+# 10.15.2026 - Acceleration data decoded with struct instead of twos_comp()
+# 10.15.2026 - Acceleration functions compiled with the native emitter,
+#              twos_comp() with the viper emitter
+# 10.15.2026 - Getters use precomputed read command bytes
+# 10.15.2026 - Added resync() to reload the shadow registers
+# 10.15.2026 - config() writes BW_RATE and POWER_CTL in one multi-byte write
+# 10.15.2026 - BSRR offset taken from the stm module. CS never toggled
+#              through the Pin object.
+# 10.15.2026 - SPI objects without write_readinto() wrapped by SendRecvSPI
+# 10.15.2026 - set_samples() compiled with the viper emitter, limited to 31
+# 10.15.2026 - Register getters/setters replaced by register tables and
+#              __getattr__()
+# 10.15.2026 - Added get_xyz_raw() (no floats)
+# 10.15.2026 - Added drain_fifo() and get_fifo_count()
+# 10.15.2026 - Removed empty config() that replaced config(data_rate, power_mode)
+# 10.15.2026 - Scale factor as integer const() fraction, added get_xyz_mg()
+# 10.15.2026 - FIFO_Mode_*() merged into set_fifo_mode()
+# 10.15.2026 - Polled registers read with prebuilt transmit buffers
+# 10.15.2026 - Added read_xyz_into() (no allocation)
+# 10.15.2026 - Register getters/setters added to the class from the register
+#              tables when the module is imported (replaces __getattr__())
+# 10.15.2026 - read_xyz_into() does the SPI transaction itself instead of
+#              calling mem_read_xyz()
+# 10.15.2026 - Removed read_fifo_raw(), read_fifo() uses drain_fifo()
+#              (drain_fifo() binds its method and function to locals)
+# 10.15.2026 - read_fifo() uses one raw buffer (the record loop in main.py
+#              does its own double buffering)
+# 10.15.2026 - mem_write()/mem_write_burst() check the register address
+#              against the shadow registers
 #=========================================================================
 # SCHEMATIC:
 # The axes of the ADXL375 are configured as follows(note the mark in the 
@@ -58,9 +98,241 @@
 #=========================================================================
 # IMPORT MODULES
 #=========================================================================
-import micropython
+import micropython, array, struct, utime
+from micropython import const
 #from pyb import SPI
 
+# Offset of the bit set/reset register (BSRR) in a GPIO port. Ports without
+# the stm module use the value from the STM32F4 reference manual.
+try:
+    from stm import GPIO_BSRR
+except ImportError:
+    GPIO_BSRR = 0x18
+
+
+
+
+
+
+
+
+
+
+#=========================================================================
+# CONSTANTS
+#=========================================================================
+# Constants used inside the ADXL375 functions. Because they are declared
+# with const() and start with an underscore, the compiler replaces every
+# use with the value itself, so there is no dictionary lookup at runtime.
+# The ADXL375 class makes them available under their public names.
+
+# GENERAL
+_FIFO_DEPTH         = const(32)         # Number of samples the FIFO buffer can hold
+_SCALE_NUM          = const(488)        # Scale factor is _SCALE_NUM/_SCALE_DEN = 0.0488 [g/LSB]
+_SCALE_DEN          = const(10000)      # (integer fraction so it can be used without floats)
+
+# INDEX OF THE CS PIN VALUES (see ADXL375.cs)
+_CS_BSRR            = const(0)          # Address of the BSRR register of the CS pin's GPIO port
+_CS_SET             = const(1)          # Value written to BSRR to drive the pin high
+_CS_RESET           = const(2)          # Value written to BSRR to drive the pin low
+
+# BIT MASKS
+_READ_MASK          = const(0b10000000)
+_WRITE_MASK         = const(0b00000000)
+_READ_2_BYTES_MASK  = const(0b01000000)
+
+# REGISTER MAP (page 20 of datasheet)
+_DEVID              = const(0x00)     # Device ID
+_THRESH_SHOCK       = const(0x1D)     # Shock threshold
+_OFSX               = const(0x1E)     # X-axis offset
+_OFSY               = const(0x1F)     # Y-axis offset
+_OFSZ               = const(0x20)     # Z-axis offset
+_DUR                = const(0x21)     # Shock duration
+_Latent             = const(0x22)     # Shock latency
+_Window             = const(0x23)     # Shock window
+_THRESH_ACT         = const(0x24)     # Activity threshold
+_THRESH_INACT       = const(0x25)     # Inactivity threshold
+_TIME_INACT         = const(0x26)     # Inactivity time
+_ACT_INACT_CTL      = const(0x27)     # Axis enable control for activity and inactivity detection
+_SHOCK_AXES         = const(0x2A)     # Axis control for single shock/double shock
+_ACT_SHOCK_STATUS   = const(0x2B)     # Source of single shock/double shock
+_BW_RATE            = const(0x2C)     # Data rate and power mode control
+_POWER_CTL          = const(0x2D)     # Power saving features control
+_INT_ENABLE         = const(0x2E)     # Interrupt enable control
+_INT_MAP            = const(0x2F)     # Interrupt mapping control
+_INT_SOURCE         = const(0x30)     # Interrupt source
+_DATA_FORMAT        = const(0x31)     # Data format control
+_DATAX0             = const(0x32)     # X-axis Data 0
+_DATAX1             = const(0x33)     # X-axis Data 1
+_DATAY0             = const(0x34)     # Y-axis Data 0
+_DATAY1             = const(0x35)     # Y-axis Data 1
+_DATAZ0             = const(0x36)     # Z-axis Data 0
+_DATAZ1             = const(0x37)     # Z-axis Data 1
+_FIFO_CTL           = const(0x38)     # FIFO control
+_FIFO_STATUS        = const(0x39)     # FIFO status
+
+# REGISTER BITS
+_LOW_POWER          = const(0b00010000)
+_Measure            = const(0b00001000)
+_SELF_TEST          = const(0b10000000)
+_SPI                = const(0b01000000)
+_INT_INVERT         = const(0b00100000)
+_Justify            = const(0b00000100)
+_FIFO_MODE_Bypass   = const(0b00000000)
+_FIFO_MODE_FIFO     = const(0b01000000)
+_FIFO_MODE_Stream   = const(0b10000000)
+_FIFO_MODE_Trigger  = const(0b11000000)
+_Trigger            = const(0b00100000)
+
+# COMMAND BYTES
+# Register address with the read and multi-byte bits already set, so no
+# bits have to be set at runtime. Write commands are the bare register
+# address (the write bit is 0), so they don't need their own.
+# Multi-byte reads
+_CMD_RD_XYZ              = const(_DATAX0 | _READ_MASK | _READ_2_BYTES_MASK) # X, Y and Z data (6 bytes)
+_CMD_RD_DATAX            = const(_DATAX0 | _READ_MASK | _READ_2_BYTES_MASK) # X-axis data (2 bytes)
+_CMD_RD_DATAY            = const(_DATAY0 | _READ_MASK | _READ_2_BYTES_MASK) # Y-axis data (2 bytes)
+_CMD_RD_DATAZ            = const(_DATAZ0 | _READ_MASK | _READ_2_BYTES_MASK) # Z-axis data (2 bytes)
+# Single register reads
+_CMD_RD_DEVID            = const(_DEVID | _READ_MASK)
+_CMD_RD_INT_SOURCE       = const(_INT_SOURCE | _READ_MASK)
+_CMD_RD_FIFO_STATUS      = const(_FIFO_STATUS | _READ_MASK)
+
+# REGISTER TABLES
+# Registers that can be read with get_<REGISTER>() and written with
+# set_<REGISTER>(data) (see add_register_functions())
+READ_REGISTERS = {
+    'DEVID'             : _DEVID,
+    'THRESH_SHOCK'      : _THRESH_SHOCK,
+    'OFSX'              : _OFSX,
+    'OFSY'              : _OFSY,
+    'OFSZ'              : _OFSZ,
+    'DUR'               : _DUR,
+    'Latent'            : _Latent,
+    'Window'            : _Window,
+    'THRESH_ACT'        : _THRESH_ACT,
+    'THRESH_INACT'      : _THRESH_INACT,
+    'TIME_INACT'        : _TIME_INACT,
+    'ACT_INACT_CTL'     : _ACT_INACT_CTL,
+    'SHOCK_AXES'        : _SHOCK_AXES,
+    'ACT_SHOCK_STATUS'  : _ACT_SHOCK_STATUS,
+    'BW_RATE'           : _BW_RATE,
+    'POWER_CTL'         : _POWER_CTL,
+    'INT_ENABLE'        : _INT_ENABLE,
+    'INT_MAP'           : _INT_MAP,
+    'INT_SOURCE'        : _INT_SOURCE,
+    'DATA_FORMAT'       : _DATA_FORMAT,
+    'DATAX0'            : _DATAX0,
+    'DATAX1'            : _DATAX1,
+    'DATAY0'            : _DATAY0,
+    'DATAY1'            : _DATAY1,
+    'DATAZ0'            : _DATAZ0,
+    'DATAZ1'            : _DATAZ1,
+    'FIFO_CTL'          : _FIFO_CTL,
+    'FIFO_STATUS'       : _FIFO_STATUS,
+}
+WRITE_REGISTERS = {
+    'THRESH_SHOCK'      : _THRESH_SHOCK,
+    'OFSX'              : _OFSX,
+    'OFSY'              : _OFSY,
+    'OFSZ'              : _OFSZ,
+    'DUR'               : _DUR,
+    'Latent'            : _Latent,
+    'Window'            : _Window,
+    'THRESH_ACT'        : _THRESH_ACT,
+    'THRESH_INACT'      : _THRESH_INACT,
+    'TIME_INACT'        : _TIME_INACT,
+    'ACT_INACT_CTL'     : _ACT_INACT_CTL,
+    'SHOCK_AXES'        : _SHOCK_AXES,
+    'BW_RATE'           : _BW_RATE,
+    'POWER_CTL'         : _POWER_CTL,
+    'INT_ENABLE'        : _INT_ENABLE,
+    'INT_MAP'           : _INT_MAP,
+    'DATA_FORMAT'       : _DATA_FORMAT,
+    'FIFO_CTL'          : _FIFO_CTL,
+}
+
+
+
+
+
+
+
+
+
+
+
+#=========================================================================
+# MODULE FUNCTIONS
+#=========================================================================
+@micropython.viper
+def decode_fifo(buf: ptr8, out: ptr16, n: int) -> int:
+    '''Decodes @param n samples read out of the FIFO buffer. Each sample in
+        @param buf takes 6 bytes (the X, Y, Z data registers). The raw 16 bit
+        values are stored per axis in @param out, which must be an array of
+        type 'h' that holds 3*32 values: the X values of all samples come
+        first, then all Y values at index 32, then all Z values at index 64.
+
+        @return the number of samples decoded
+    '''
+    for i in range(n):
+        b = 6*i
+        out[i]                      = buf[b]     | (buf[b + 1] << 8) # X
+        out[i + _FIFO_DEPTH]        = buf[b + 2] | (buf[b + 3] << 8) # Y
+        out[i + 2*_FIFO_DEPTH]      = buf[b + 4] | (buf[b + 5] << 8) # Z
+    return n
+
+@micropython.viper
+def to_mg(raw: ptr16, out: ptr32, n: int) -> int:
+    '''Converts the first @param n raw values in @param raw (an array of type 'h',
+        e.g. one of the axes returned by read_fifo()) into milli-g and stores them in
+        @param out (an array of type 'i'). Only integer math is used, so no
+        floats are created.
+
+        @return the number of values converted
+    '''
+    for i in range(n):
+        val = raw[i]
+        if val & 0x8000: # Sign bit is set
+            val = val - 0x10000
+        out[i] = (val * _SCALE_NUM) // (_SCALE_DEN // 1000) # 48.8 mg/LSB
+    return n
+
+
+
+
+
+
+
+
+
+
+#=========================================================================
+# SPI ADAPTER
+#=========================================================================
+class SendRecvSPI:
+    ''' This class wraps an SPI object that only has the send(), recv() and send_recv()
+        functions so that it can be used through write(), readinto() and write_readinto(),
+        the functions used by the ADXL375 class.'''
+
+    def __init__(self, spi):
+        ''' Constructor for a SendRecvSPI object.
+            @param spi the spi bus object that is wrapped
+        '''
+        self.spi = spi
+
+    def write(self, buf):
+        '''Sends the bytes in @param buf.'''
+        self.spi.send(buf)
+
+    def readinto(self, buf):
+        '''Reads len(@param buf) bytes into @param buf.'''
+        self.spi.recv(buf)
+
+    def write_readinto(self, write_buf, read_buf):
+        '''Sends the bytes in @param write_buf while reading into @param read_buf.'''
+        self.spi.send_recv(write_buf, read_buf)
+
 
 
 
@@ -82,49 +354,50 @@ class ADXL375:
     # -------------------------------------
     # GENERAL
     # -------------------------------------
-    SCALE_FACTOR        = 0.0488            # [g/LSB]
+    SCALE_FACTOR        = _SCALE_NUM/_SCALE_DEN # [g/LSB] (0.0488)
+    FIFO_DEPTH          = _FIFO_DEPTH       # Number of samples the FIFO buffer can hold
 
     # -------------------------------------
     # BIT MASKS
     # -------------------------------------
     # These masks are used to set reading and writing protocols.
-    READ_MASK           = const(0b10000000)
-    WRITE_MASK          = const(0b00000000)
-    READ_2_BYTES_MASK   = const(0b01000000)
+    READ_MASK           = _READ_MASK
+    WRITE_MASK          = _WRITE_MASK
+    READ_2_BYTES_MASK   = _READ_2_BYTES_MASK
 
     # -------------------------------------
     # REGISTER MAP (page 20 of datasheet)
     # -------------------------------------
     # All registers in the ADXL375 are eight bits in length.
-    DEVID               = 0x00              # Device ID
+    DEVID               = _DEVID            # Device ID
     # Reserved            0x01 to 0x1C      # Reserved; do not access
-    THRESH_SHOCK        = 0x1D              # Shock threshold
-    OFSX                = 0x1E              # X-axis offset
-    OFSY                = 0x1F              # Y-axis offset
-    OFSZ                = 0x20              # Z-axis offset
-    DUR                 = 0x21              # Shock duration
-    Latent              = 0x22              # Shock latency
-    Window              = 0x23              # Shock window
-    THRESH_ACT          = 0x24              # Activity threshold
-    THRESH_INACT        = 0x25              # Inactivity threshold
-    TIME_INACT          = 0x26              # Inactivity time
-    ACT_INACT_CTL       = 0x27              # Axis enable control for activity and inactivity detection
-    SHOCK_AXES          = 0x2A              # Axis control for single shock/double shock
-    ACT_SHOCK_STATUS    = 0x2B              # Source of single shock/double shock
-    BW_RATE             = 0x2C              # Data rate and power mode control
-    POWER_CTL           = 0x2D              # Power saving features control
-    INT_ENABLE          = 0x2E              # Interrupt enable control
-    INT_MAP             = 0x2F              # Interrupt mapping control
-    INT_SOURCE          = 0x30              # Interrupt source
-    DATA_FORMAT         = 0x31              # Data format control
-    DATAX0              = 0x32              # X-axis Data 0
-    DATAX1              = 0x33              # X-axis Data 1
-    DATAY0              = 0x34              # Y-axis Data 0
-    DATAY1              = 0x35              # Y-axis Data 1
-    DATAZ0              = 0x36              # Z-axis Data 0
-    DATAZ1              = 0x37              # Z-axis Data 1
-    FIFO_CTL            = 0x38              # FIFO control
-    FIFO_STATUS         = 0x39              # FIFO status
+    THRESH_SHOCK        = _THRESH_SHOCK     # Shock threshold
+    OFSX                = _OFSX             # X-axis offset
+    OFSY                = _OFSY             # Y-axis offset
+    OFSZ                = _OFSZ             # Z-axis offset
+    DUR                 = _DUR              # Shock duration
+    Latent              = _Latent           # Shock latency
+    Window              = _Window           # Shock window
+    THRESH_ACT          = _THRESH_ACT       # Activity threshold
+    THRESH_INACT        = _THRESH_INACT     # Inactivity threshold
+    TIME_INACT          = _TIME_INACT       # Inactivity time
+    ACT_INACT_CTL       = _ACT_INACT_CTL    # Axis enable control for activity and inactivity detection
+    SHOCK_AXES          = _SHOCK_AXES       # Axis control for single shock/double shock
+    ACT_SHOCK_STATUS    = _ACT_SHOCK_STATUS # Source of single shock/double shock
+    BW_RATE             = _BW_RATE          # Data rate and power mode control
+    POWER_CTL           = _POWER_CTL        # Power saving features control
+    INT_ENABLE          = _INT_ENABLE       # Interrupt enable control
+    INT_MAP             = _INT_MAP          # Interrupt mapping control
+    INT_SOURCE          = _INT_SOURCE       # Interrupt source
+    DATA_FORMAT         = _DATA_FORMAT      # Data format control
+    DATAX0              = _DATAX0           # X-axis Data 0
+    DATAX1              = _DATAX1           # X-axis Data 1
+    DATAY0              = _DATAY0           # Y-axis Data 0
+    DATAY1              = _DATAY1           # Y-axis Data 1
+    DATAZ0              = _DATAZ0           # Z-axis Data 0
+    DATAZ1              = _DATAZ1           # Z-axis Data 1
+    FIFO_CTL            = _FIFO_CTL         # FIFO control
+    FIFO_STATUS         = _FIFO_STATUS      # FIFO status
 
     # -------------------------------------
     # REGISTER BIT DESCRIPTIONS
@@ -159,7 +432,7 @@ class ADXL375:
     SHOCK_Z_source      = micropython.const(0b00000001)
 
     # Register 0x2C—BW_RATE (Read/Write) bits
-    LOW_POWER           = micropython.const(0b00010000)
+    LOW_POWER           = _LOW_POWER
     ODR_3200HZ          = micropython.const(0b00001111)
     ODR_1600HZ          = micropython.const(0b00001110)
     ODR_800HZ           = micropython.const(0b00001101)
@@ -180,7 +453,7 @@ class ADXL375:
     # Register 0x2D-POWER_CTL (Read/Write) bits
     Link                = micropython.const(0b00100000)
     AUTO_SLEEP          = micropython.const(0b00010000)
-    Measure             = micropython.const(0b00001000)
+    Measure             = _Measure
     Sleep               = micropython.const(0b00000100)
     Wakeup_8HZ          = micropython.const(0b00000000)
     Wakeup_4HZ          = micropython.const(0b00000001)
@@ -215,17 +488,17 @@ class ADXL375:
     Overrun_source      = micropython.const(0b00000001)    
 
     # Register 0x31-DATA_FORMAT (Read/Write) bits
-    SELF_TEST           = micropython.const(0b10000000)
-    SPI                 = micropython.const(0b01000000)
-    INT_INVERT          = micropython.const(0b00100000)
-    Justify             = micropython.const(0b00000100)
+    SELF_TEST           = _SELF_TEST
+    SPI                 = _SPI
+    INT_INVERT          = _INT_INVERT
+    Justify             = _Justify
 
     # Register 0x38-FIFO_CTL (Read/Write) bits
-    FIFO_MODE_Bypass    = micropython.const(0b00000000)
-    FIFO_MODE_FIFO      = micropython.const(0b01000000)
-    FIFO_MODE_Stream    = micropython.const(0b10000000)
-    FIFO_MODE_Trigger   = micropython.const(0b11000000)
-    Trigger             = micropython.const(0b00100000)
+    FIFO_MODE_Bypass    = _FIFO_MODE_Bypass
+    FIFO_MODE_FIFO      = _FIFO_MODE_FIFO
+    FIFO_MODE_Stream    = _FIFO_MODE_Stream
+    FIFO_MODE_Trigger   = _FIFO_MODE_Trigger
+    Trigger             = _Trigger
 
     # Register 0x39-FIFO_STATUS (Read only) bits
     FIFO_TRIG           = micropython.const(0b10000000)
@@ -240,12 +513,59 @@ class ADXL375:
             @param spi the spi bus object used for communication with the accelerometer
         '''
 
+        # The register functions call write(), readinto() and write_readinto() directly.
+        # An SPI object that only has send()/recv()/send_recv() is wrapped once here.
+        if not hasattr(spi, 'write_readinto'):
+            spi = SendRecvSPI(spi)
+
         self.spi     = spi
         self.CS_pin  = CS_pin
+
+        # Address of the bit set/reset register (BSRR) of the CS pin's GPIO port and
+        # the values that drive the pin high (lower 16 bits) or low (upper 16 bits).
+        # Every attribute access (self.x) is a lookup in the object's dictionary, so
+        # the three values are packed into one array. The register access functions
+        # then need a single lookup to toggle the CS pin.
+        self.cs = array.array('I', (CS_pin.gpio() + GPIO_BSRR,   # _CS_BSRR
+                                    1 << CS_pin.pin(),           # _CS_SET
+                                    1 << (CS_pin.pin() + 16)))   # _CS_RESET
+
+        # All buffers used for SPI transfers are allocated here, once, and reused
+        # by every read/write so that no memory is allocated during acquisition.
         self.buf     = bytearray(2) # Buffer used to store values when reading/writing to sensor
         self.buf_2   = bytearray(3) # Buffer used to store values from multi-reading
+        self.buf_xyz = bytearray(7) # Buffer used to store X, Y and Z data (command byte + 6 bytes)
+
+        # Prebuilt transmit buffers (command byte + dummy byte) of the registers that
+        # are polled. They are never written to, so fast_read() doesn't have to set
+        # up a buffer before each read.
+        self.hdr_devid       = bytes((_CMD_RD_DEVID, 0))
+        self.hdr_int_source  = bytes((_CMD_RD_INT_SOURCE, 0))
+        self.hdr_fifo_status = bytes((_CMD_RD_FIFO_STATUS, 0))
+        self.rx_2            = bytearray(2) # Receive buffer of fast_read()
+
+        # Buffers used by read_fifo(). The raw samples are decoded right away, so
+        # one raw buffer is enough.
+        self.fifo_raw   = bytearray(6*_FIFO_DEPTH) # Raw samples
+        # The decoded samples are stored per axis (structure of arrays): one array
+        # of 3*32 values that is split into an X, Y and Z view without copying.
+        self.fifo_data  = array.array('h', bytearray(2*3*_FIFO_DEPTH)) # Decoded samples
+        data_mv         = memoryview(self.fifo_data)
+        self.x          = data_mv[0:_FIFO_DEPTH]                 # X values of the samples
+        self.y          = data_mv[_FIFO_DEPTH:2*_FIFO_DEPTH]     # Y values of the samples
+        self.z          = data_mv[2*_FIFO_DEPTH:3*_FIFO_DEPTH]   # Z values of the samples
+        self.xyz        = (self.x, self.y, self.z)
+
+        # Shadow copy of the registers, indexed by register address. Every write
+        # goes through mem_write(), which keeps the copy up to date, so the bit
+        # helpers below only need one SPI write instead of a read and a write.
+        self.shadow     = bytearray(_FIFO_STATUS + 1)
+        self.config_mode = False # True between begin_config() and end_config()
+        self.cmd_wr_burst = bytearray(1) # Command byte of a multi-byte write
 
-        self.CS_pin.high() # CS pin needs to idle high
+        self.cs_high() # CS pin needs to idle high
+
+        self.resync() # Read the configuration registers once to fill the shadow registers
 
 
 
@@ -256,45 +576,145 @@ class ADXL375:
     # -------------------------------------
     # UTILITY FUNCTIONS
     # -------------------------------------
-    def mem_read(self, mem_addr):
+    # The register access functions are called for every SPI transaction,
+    # so they are compiled to machine code with the viper emitter. The CS pin
+    # is toggled by writing straight to the BSRR register of its GPIO port
+    # instead of going through the Pin object. Writes to BSRR are atomic, so
+    # this is safe even if other code uses pins on the same port.
+    @micropython.viper
+    def cs_low(self):
+        '''This function pulls the CS pin low (starts a transaction).'''
+        cs = ptr32(self.cs)
+        ptr32(cs[_CS_BSRR])[0] = cs[_CS_RESET]
+
+    @micropython.viper
+    def cs_high(self):
+        '''This function pulls the CS pin high (ends a transaction).'''
+        cs = ptr32(self.cs)
+        ptr32(cs[_CS_BSRR])[0] = cs[_CS_SET]
+
+    @micropython.viper
+    def mem_read(self, mem_addr: int):
         '''This function reads data from the address specified by @param mem_addr and stores
             it in the second byte of @param buf.
         '''
-        # Sets proper bit in order to read data
-        self.buf[0] = (mem_addr | self.READ_MASK)
-        self.buf[1] = 0b00000000 # Set a value just to maintain order of buffer
+        buf = self.buf
+        cs = ptr32(self.cs)
+        bsrr = ptr32(cs[_CS_BSRR])
+        b = ptr8(buf)
 
+        # Sets proper bit in order to read data
+        b[0] = mem_addr | _READ_MASK
+        b[1] = 0b00000000 # Set a value just to maintain order of buffer
 
-        self.CS_pin.low()
-        self.spi.send_recv(self.buf, self.buf)
-        self.CS_pin.high()
+        bsrr[0] = cs[_CS_RESET] # CS low
+        self.spi.write_readinto(buf, buf)
+        bsrr[0] = cs[_CS_SET] # CS high
 
-    def mem_read_2bytes(self, mem_addr):
+    @micropython.viper
+    def mem_read_2bytes(self, mem_addr: int):
         '''This function reads two consequetive bytes of data starting from the address specified
             @param mem_addr. The value is stored in the last two bytes of @param buf_2
         '''
+        buf_2 = self.buf_2
+        cs = ptr32(self.cs)
+        bsrr = ptr32(cs[_CS_BSRR])
 
         # Sets proper bit in order to read data
-        self.buf_2[0] = (mem_addr | self.READ_MASK | self.READ_2_BYTES_MASK)
+        ptr8(buf_2)[0] = mem_addr | _READ_MASK | _READ_2_BYTES_MASK
 
-        self.CS_pin.low()
-        self.spi.send_recv(self.buf_2, self.buf_2)
-        self.CS_pin.high()
+        bsrr[0] = cs[_CS_RESET] # CS low
+        self.spi.write_readinto(buf_2, buf_2)
+        bsrr[0] = cs[_CS_SET] # CS high
 
-    def mem_write(self, mem_addr, data):
+    @micropython.viper
+    def fast_read(self, hdr) -> int:
+        '''This function sends the prebuilt transmit buffer @param hdr (one of the hdr_
+            buffers) and returns the value of the register it reads.
+        '''
+        rx = self.rx_2
+        cs = ptr32(self.cs)
+        bsrr = ptr32(cs[_CS_BSRR])
+
+        bsrr[0] = cs[_CS_RESET] # CS low
+        self.spi.write_readinto(hdr, rx)
+        bsrr[0] = cs[_CS_SET] # CS high
+        return ptr8(rx)[1]
+
+    @micropython.viper
+    def cmd_read_2bytes(self, cmd: int):
+        '''Same as mem_read_2bytes(), but @param cmd is the complete command byte (one of the
+            _CMD_RD_ constants), so no bits have to be set at runtime.
+        '''
+        buf_2 = self.buf_2
+        cs = ptr32(self.cs)
+        bsrr = ptr32(cs[_CS_BSRR])
+        ptr8(buf_2)[0] = cmd
+
+        bsrr[0] = cs[_CS_RESET] # CS low
+        self.spi.write_readinto(buf_2, buf_2)
+        bsrr[0] = cs[_CS_SET] # CS high
+
+    @micropython.viper
+    def mem_read_xyz(self):
+        '''This function reads the six data registers (DATAX0 to DATAZ1) in one multi-byte
+            read. The values are stored in the last six bytes of @param buf_xyz.
+        '''
+        buf_xyz = self.buf_xyz
+        cs = ptr32(self.cs)
+        bsrr = ptr32(cs[_CS_BSRR])
+        ptr8(buf_xyz)[0] = _CMD_RD_XYZ
+
+        # The command byte and the six data bytes are clocked in one transfer. Sending
+        # the command with write() and reading the data with readinto() clocks the
+        # same 7 bytes (the command byte can't be skipped), but costs a second SPI call.
+        bsrr[0] = cs[_CS_RESET] # CS low
+        self.spi.write_readinto(buf_xyz, buf_xyz)
+        bsrr[0] = cs[_CS_SET] # CS high
+
+    @micropython.viper
+    def mem_write(self, mem_addr: int, data: int):
         '''This function writes the data given by @param data to the memory address specified by
             @param mem_addr. Note that @param data must be 1 byte.
         '''
+        if mem_addr >= 0 and mem_addr <= _FIFO_STATUS: # The shadow registers end at FIFO_STATUS
+            ptr8(self.shadow)[mem_addr] = data # Update the shadow register
+        if self.config_mode:
+            return # The register is written by end_config()
+
+        buf = self.buf
+        cs = ptr32(self.cs)
+        bsrr = ptr32(cs[_CS_BSRR])
+        b = ptr8(buf)
 
         # Save desired address to write to in @param buf.
-        self.buf[0] = mem_addr
-        self.buf[1] = data
+        b[0] = mem_addr
+        b[1] = data
 
-        self.CS_pin.low()
-        self.spi.send(self.buf)
-        self.CS_pin.high()
+        bsrr[0] = cs[_CS_RESET] # CS low
+        self.spi.write(buf)
+        bsrr[0] = cs[_CS_SET] # CS high
 
-    def twos_comp(self, val, bits):
+    def mem_write_burst(self, mem_addr, data):
+        '''This function writes the bytes given by @param data to consecutive registers, starting
+            at the address specified by @param mem_addr, in a single transaction (multi-byte write).
+            The registers must lie within the shadow registers (0x00 - FIFO_STATUS).
+        '''
+        if mem_addr < 0 or mem_addr + len(data) > _FIFO_STATUS + 1:
+            raise ValueError('registers out of range')
+
+        self.cmd_wr_burst[0] = mem_addr | _READ_2_BYTES_MASK # Sets the multi-byte bit
+
+        self.cs_low()
+        self.spi.write(self.cmd_wr_burst)
+        self.spi.write(data)
+        self.cs_high()
+
+        for i in range(len(data)):
+            self.shadow[mem_addr + i] = data[i] # Update the shadow registers
+
+    @micropython.viper
+    def twos_comp(self, val: int, bits: int) -> int:
         '''Computes the 2's complement value of @param val, a binary number of length @param bits. 
            @return The 2's complement value of @param val. The acceleration data stored in the registers
            is stored as 2's complement format. Therefore, this function is needed in order to properly 
@@ -311,14 +731,51 @@ class ADXL375:
     # FUNCTIONS
     # -------------------------------------
     def config(self, data_rate, power_mode):
-        '''config'''
-
-        self.standby() #Puts the sensor in standby mode in order to configure
-
-        # Sets data rate
-        reg_value   = self.get_BW_RATE()  # Read current register value
-        data        = reg_value | data_rate
-        self.set_BW_RATE(data)
+        '''This function puts the ADXL375 into standby mode and sets the output data rate given
+            by @param data_rate (one of the ODR_ constants) and the power mode given by
+            @param power_mode (LOW_POWER for low power mode, 0 for normal power mode).
+            BW_RATE (0x2C) and POWER_CTL (0x2D) are next to each other, so both are written
+            in one multi-byte write, built from the shadow registers.
+        '''
+        shadow      = self.shadow
+        data        = bytearray(2)
+        data[0]     = (shadow[_BW_RATE] & ~(_LOW_POWER | 0b00001111)) | power_mode | data_rate # BW_RATE
+        data[1]     = shadow[_POWER_CTL] & ~_Measure # POWER_CTL. Sets the Measure bit to 0 (standby)
+        self.mem_write_burst(_BW_RATE, data)
+
+
+    def resync(self):
+        '''This function reads the configuration registers (BW_RATE, POWER_CTL, INT_ENABLE,
+            INT_MAP, DATA_FORMAT and FIFO_CTL) from the sensor into the shadow registers. The
+            configuration functions below only use the shadow registers, so this must be
+            called if the registers were changed without going through this object (e.g.
+            after the sensor was power cycled).
+        '''
+        for reg in (_BW_RATE, _POWER_CTL, _INT_ENABLE, _INT_MAP, _DATA_FORMAT, _FIFO_CTL):
+            self.mem_read(reg)
+            self.shadow[reg] = self.buf[1]
+
+    def begin_config(self):
+        '''This function puts the ADXL375 into standby mode and starts a configuration. Until
+            end_config() is called, the configuration functions below only change the shadow
+            registers and nothing is sent to the sensor.
+        '''
+        self.standby()
+        self.config_mode = True
+
+    def end_config(self):
+        '''This function ends a configuration started by begin_config() and writes the
+            configuration registers to the sensor. BW_RATE, POWER_CTL, INT_ENABLE and INT_MAP
+            (0x2C-0x2F) are next to each other and are written in one multi-byte write.
+            DATA_FORMAT (0x31) and FIFO_CTL (0x38) are separated from them by read only registers
+            and are written on their own. Interrupts should be enabled after end_config(), since
+            INT_ENABLE is written before INT_MAP.
+        '''
+        self.config_mode = False
+        shadow = self.shadow
+        self.mem_write_burst(_BW_RATE, shadow[_BW_RATE:_INT_MAP + 1])
+        self.mem_write(_DATA_FORMAT, shadow[_DATA_FORMAT])
+        self.mem_write(_FIFO_CTL, shadow[_FIFO_CTL])
 
 
     # -------------------------------------
@@ -331,16 +788,16 @@ class ADXL375:
             output data rates: 400Hz, 200Hz, 100Hz, 50Hz, 25Hz, 12.5Hz. For output data rates
             not listed here, the use of low power mode does not provide any advantages.
         '''
-        reg_value   = self.get_BW_RATE() # Read current register value
-        data        = reg_value | self.LOW_POWER   # Set LOW_POWER bit to 1
-        self.set_BW_RATE(data)
+        reg_value   = self.shadow[_BW_RATE] # Current register value
+        data        = reg_value | _LOW_POWER   # Set LOW_POWER bit to 1
+        self.mem_write(_BW_RATE, data)
 
     def normal_power_mode(self):
         '''This function puts the ADXL375 into normal power mode. This is the default mode
             the device is set to upon start up.'''
-        reg_value   = self.get_BW_RATE()  # Read current register value
-        data        = reg_value & ~self.LOW_POWER   # Set LOW_POWER bit to 0
-        self.set_BW_RATE(data)
+        reg_value   = self.shadow[_BW_RATE]  # Current register value
+        data        = reg_value & ~_LOW_POWER   # Set LOW_POWER bit to 0
+        self.mem_write(_BW_RATE, data)
 
     def odr(self, odr):
         '''This function sets the output data rate of the ADXL375. @param odr the desired 
@@ -363,11 +820,11 @@ class ADXL375:
                 ODR_0_20HZ          = micropython.const(0b00000001)
                 ODR_0_10HZ          = micropython.const(0b00000000)
         '''
-        reg_value   = self.get_BW_RATE()
+        reg_value   = self.shadow[_BW_RATE]
         reg_value   = (reg_value>>4)  # Shift right 4 bits
         reg_value   = (reg_value<<4)  # Shift left 4 bits. The combination of the line above and this one clears the lowest 4 bits.
         data        = reg_value | odr      # Apply desired bitmask
-        self.set_BW_RATE(data)
+        self.mem_write(_BW_RATE, data)
 
 
     # -------------------------------------
@@ -377,15 +834,15 @@ class ADXL375:
     def standby(self):
         '''This function puts the ADXL375 into standby mode. The device must be placed in standby
             mode before configuring different settings.'''
-        reg_value   = self.get_POWER_CTL()
-        temp_data   = (reg_value & ~self.Measure) # Sets the Measure bit to 0
-        self.set_POWER_CTL(temp_data)
+        reg_value   = self.shadow[_POWER_CTL]
+        temp_data   = (reg_value & ~_Measure) # Sets the Measure bit to 0
+        self.mem_write(_POWER_CTL, temp_data)
 
     def measure(self):
         '''This function puts the ADXL375 into measurement mode.'''
-        reg_value   = self.get_POWER_CTL()
-        data        = reg_value | self.Measure # Sets the Measure bit to 1
-        self.set_POWER_CTL(data)
+        reg_value   = self.shadow[_POWER_CTL]
+        data        = reg_value | _Measure # Sets the Measure bit to 1
+        self.mem_write(_POWER_CTL, data)
    
 
     # -------------------------------------
@@ -405,9 +862,9 @@ class ADXL375:
                 Watermark_enable    = micropython.const(0b00000010)
                 Overrun_enable      = micropython.const(0b00000001) 
         '''
-        reg_value   = self.get_INT_ENABLE()
+        reg_value   = self.shadow[_INT_ENABLE]
         data        = reg_value | int_mask # Sets the bit specified by int_mask to 1
-        self.set_INT_ENABLE(data)
+        self.mem_write(_INT_ENABLE, data)
 
     def int_disable(self, int_mask):
         '''This function disables the interrupt specified by the bitmask @param int_mask. The options for @param int_mask are as follows:
@@ -420,9 +877,9 @@ class ADXL375:
                 Watermark_enable    = micropython.const(0b00000010)
                 Overrun_enable      = micropython.const(0b00000001) 
         '''
-        reg_value   = self.get_INT_ENABLE()
+        reg_value   = self.shadow[_INT_ENABLE]
         data        = (reg_value & ~int_mask) # Sets the bit specified by int_mask to 0
-        self.set_INT_ENABLE(data)
+        self.mem_write(_INT_ENABLE, data)
 
     # -------------------------------------
     # INTERRUPT MAPPING CONTROL
@@ -440,9 +897,9 @@ class ADXL375:
                 Watermark_enable    = micropython.const(0b00000010)
                 Overrun_enable      = micropython.const(0b00000001)
         '''
-        reg_value   = self.get_INT_MAP()
+        reg_value   = self.shadow[_INT_MAP]
         data        = (reg_value & ~int_mask) # Sets the bit specified by int_mask to 0
-        self.set_INT_MAP(data)    
+        self.mem_write(_INT_MAP, data)    
 
     def int_map_int2(self, int_mask):
         '''This function maps the interrupt given by the bit mask @param int_mask to pin INT2. 
@@ -456,9 +913,9 @@ class ADXL375:
                 Watermark_enable    = micropython.const(0b00000010)
                 Overrun_enable      = micropython.const(0b00000001)
         '''
-        reg_value   = self.get_INT_MAP()
+        reg_value   = self.shadow[_INT_MAP]
         data        = reg_value | int_mask # Sets the bit specified by int_mask to 1
-        self.set_INT_MAP(data)
+        self.mem_write(_INT_MAP, data)
 
 
 
@@ -472,55 +929,55 @@ class ADXL375:
         '''This function begins the self test feature of the ADXL375 by exerting an electrostatic
             force on the sensor.
         '''
-        reg_value   = self.get_DATA_FORMAT()
-        data        = reg_value | self.SELF_TEST # Sets the SELF_TEST bit to 1
-        self.set_DATA_FORMAT(data)   
+        reg_value   = self.shadow[_DATA_FORMAT]
+        data        = reg_value | _SELF_TEST # Sets the SELF_TEST bit to 1
+        self.mem_write(_DATA_FORMAT, data)   
 
     def end_self_test(self):
         '''This function ends the self test feature of the ADXL375.'''
-        reg_value   = self.get_DATA_FORMAT()
-        data        = reg_value & ~self.SELF_TEST # Sets the SELF_TEST bit to 0
-        self.set_DATA_FORMAT(data)
+        reg_value   = self.shadow[_DATA_FORMAT]
+        data        = reg_value & ~_SELF_TEST # Sets the SELF_TEST bit to 0
+        self.mem_write(_DATA_FORMAT, data)
 
     def spi_3_wire(self):
         '''This function configures the ADXL375 for 3 wire SPI mode.'''
-        reg_value   = self.get_DATA_FORMAT()
-        data        = reg_value | self.SPI # Sets the SPI bit to 1
-        self.set_DATA_FORMAT(data)  
+        reg_value   = self.shadow[_DATA_FORMAT]
+        data        = reg_value | _SPI # Sets the SPI bit to 1
+        self.mem_write(_DATA_FORMAT, data)  
 
     def spi_4_wire(self):
         '''This function configures the ADXL375 for 4 wire SPI mode. This is the default state
             upon startup.
         '''
-        reg_value   = self.get_DATA_FORMAT()
-        data        = reg_value & ~self.SPI # Sets the SPI bit to 0
-        self.set_DATA_FORMAT(data)
+        reg_value   = self.shadow[_DATA_FORMAT]
+        data        = reg_value & ~_SPI # Sets the SPI bit to 0
+        self.mem_write(_DATA_FORMAT, data)
 
     def interrupt_active_low(self):
         '''This function sets the polarity of the interrupt pins to active low.'''
-        reg_value   = self.get_DATA_FORMAT()
-        data        = reg_value | self.INT_INVERT # Sets the INT_INVERT bit to 1
-        self.set_DATA_FORMAT(data)    
+        reg_value   = self.shadow[_DATA_FORMAT]
+        data        = reg_value | _INT_INVERT # Sets the INT_INVERT bit to 1
+        self.mem_write(_DATA_FORMAT, data)    
 
     def interrupt_active_high(self):
         '''This function sets the polarity of the interrupt pins to active high.'''
-        reg_value   = self.get_DATA_FORMAT()
-        data        = reg_value & ~self.INT_INVERT # Sets the INT_INVERT bit to 0
-        self.set_DATA_FORMAT(data)  
+        reg_value   = self.shadow[_DATA_FORMAT]
+        data        = reg_value & ~_INT_INVERT # Sets the INT_INVERT bit to 0
+        self.mem_write(_DATA_FORMAT, data)  
 
     def left_justify(self):
         '''This function sets the acceleration data to be left justified (MSB).'''
-        reg_value   = self.get_DATA_FORMAT()
-        data        = reg_value | self.Justify # Sets the Justify bit to 1
-        self.set_DATA_FORMAT(data)
+        reg_value   = self.shadow[_DATA_FORMAT]
+        data        = reg_value | _Justify # Sets the Justify bit to 1
+        self.mem_write(_DATA_FORMAT, data)
 
     def right_justify(self):
         '''This function sets the acceleration data to be right justified (LSB) with
             sign extension.
         '''
-        reg_value   = self.get_DATA_FORMAT()
-        data        = reg_value & ~self.Justify # Sets the Justify bit to 0
-        self.set_DATA_FORMAT(data)
+        reg_value   = self.shadow[_DATA_FORMAT]
+        data        = reg_value & ~_Justify # Sets the Justify bit to 0
+        self.mem_write(_DATA_FORMAT, data)
 
 
     # SELF_TEST           = micropython.const(0b10000000)
@@ -532,96 +989,132 @@ class ADXL375:
     # ACCELERATION DATA
     # Register 0x32-0x37-ACCELERATION DATA (Read only) bits
     # -------------------------------------
+    @micropython.native
     def get_x_acceleration(self):
         '''This function returns the x-axis acceleration of the device. Note that for general
             data acquisition this should be used over 'get_DATAX0()' and 'get_DATAX1()' because
-            it reads the two bytes sequentially using the 'mem_read_2bytes()' function. This
+            it reads the two bytes sequentially using the 'cmd_read_2bytes()' function. This
             ensures that the data in the registers doesn't change from one read to the next.'''
 
-        self.mem_read_2bytes(self.DATAX0)
-        LSB = self.buf_2[1]
-        MSB = self.buf_2[2]
-        data = (MSB << 8) + LSB
-        return self.twos_comp(data, 16)*self.SCALE_FACTOR 
+        self.cmd_read_2bytes(_CMD_RD_DATAX)
+        return struct.unpack_from('<h', self.buf_2, 1)[0]*self.SCALE_FACTOR # Signed 16 bit, LSB first
 
+    @micropython.native
     def get_y_acceleration(self):
         '''This function returns the y-axis acceleration of the device. Note that for general
             data acquisition this should be used over 'get_DATAY0()' and 'get_DATAY1()' because
-            it reads the two bytes sequentially using the 'mem_read_2bytes()' function. This
+            it reads the two bytes sequentially using the 'cmd_read_2bytes()' function. This
             ensures that the data in the registers doesn't change from one read to the next.'''
 
-        self.mem_read_2bytes(self.DATAY0)
-        LSB = self.buf_2[1]
-        MSB = self.buf_2[2]
-        data = (MSB << 8) + LSB
-        return self.twos_comp(data, 16)*self.SCALE_FACTOR  
+        self.cmd_read_2bytes(_CMD_RD_DATAY)
+        return struct.unpack_from('<h', self.buf_2, 1)[0]*self.SCALE_FACTOR # Signed 16 bit, LSB first
 
+    @micropython.native
     def get_z_acceleration(self):
         '''This function returns the x-axis acceleration of the device. Note that for general
             data acquisition this should be used over 'get_DATAZ0()' and 'get_DATAZ1()' because
-            it reads the two bytes sequentially using the 'mem_read_2bytes()' function. This
+            it reads the two bytes sequentially using the 'cmd_read_2bytes()' function. This
             ensures that the data in the registers doesn't change from one read to the next.'''
 
-        self.mem_read_2bytes(self.DATAZ0)
-        LSB = self.buf_2[1]
-        MSB = self.buf_2[2]
-        data = (MSB << 8) + LSB
-        return self.twos_comp(data, 16)*self.SCALE_FACTOR  
+        self.cmd_read_2bytes(_CMD_RD_DATAZ)
+        return struct.unpack_from('<h', self.buf_2, 1)[0]*self.SCALE_FACTOR # Signed 16 bit, LSB first
+
+    @micropython.native
+    def get_xyz_acceleration(self):
+        '''This function returns the x, y and z-axis acceleration of the device as the tuple
+            (x, y, z). All six data registers are read in one transaction, which is faster than
+            calling the three functions above and makes sure the three values belong to the
+            same sample. Use this function when more than one axis is needed.'''
+
+        x, y, z = self.get_xyz_raw()
+        scale = self.SCALE_FACTOR
+        return (x*scale, y*scale, z*scale)
+
+    @micropython.native
+    def get_xyz_raw(self):
+        '''This function returns the raw x, y and z-axis values of the device as the tuple
+            (x, y, z) of signed 16 bit integers. Multiply them by SCALE_FACTOR to get g. Code
+            that streams or logs data should use this function and leave the scaling to the
+            computer that reads the data, so no floats are created on the board.'''
+
+        self.mem_read_xyz()
+        return struct.unpack_from('<hhh', self.buf_xyz, 1) # Signed 16 bit, LSB first
+
+    @micropython.native
+    def get_xyz_mg(self):
+        '''This function returns the x, y and z-axis acceleration of the device in milli-g as
+            the tuple (x, y, z) of integers. Only integer math is used, so no floats are created.'''
+
+        x, y, z = self.get_xyz_raw()
+        return ((x*_SCALE_NUM) // (_SCALE_DEN // 1000),
+                (y*_SCALE_NUM) // (_SCALE_DEN // 1000),
+                (z*_SCALE_NUM) // (_SCALE_DEN // 1000))
+
+    @micropython.viper
+    def read_xyz_into(self, buf: ptr8, off: int):
+        '''This function reads the x, y and z-axis data of the device in one transaction and
+            copies the 6 raw bytes (X0, X1, Y0, Y1, Z0, Z1) into @param buf starting at index
+            @param off. Nothing is allocated, so this can be called at a high rate with one
+            large buffer that is allocated up front. The transaction is the same as in
+            mem_read_xyz(), but done here so that there is no extra method call per sample.
+        '''
+        buf_xyz = self.buf_xyz
+        cs = ptr32(self.cs)
+        bsrr = ptr32(cs[_CS_BSRR])
+        src = ptr8(buf_xyz)
+        src[0] = _CMD_RD_XYZ
+
+        bsrr[0] = cs[_CS_RESET] # CS low
+        self.spi.write_readinto(buf_xyz, buf_xyz)
+        bsrr[0] = cs[_CS_SET] # CS high
+
+        for i in range(6):
+            buf[off + i] = src[i + 1] # Skip the command byte
 
 
     # -------------------------------------
     # FIFO CONTROL
     # Register 0x38-FIFO_CTL (Read/Write) bits
     # -------------------------------------        
-    def FIFO_Mode_Bypass(self):
-        '''Sets the FIFO buffer to bypass mode (the FIFO buffer is bypassed (ignored))'''
-
-        reg_value   = self.get_FIFO_CTL()
-        reg_value   = reg_value & 0b00111111 # Clears the two most significant bits
-        data        = reg_value + self.FIFO_MODE_Bypass # Add bit mask to set two most significant bits
-        self.set_FIFO_CTL(data)
-
-    def FIFO_Mode_FIFO(self):
-        '''Sets the FIFO buffer to FIFO mode'''
-
-        reg_value   = self.get_FIFO_CTL()
-        reg_value   = reg_value & 0b00111111 # Clears the two most significant bits
-        data        = reg_value + self.FIFO_MODE_FIFO # Add bit mask to set two most significant bits
-        self.set_FIFO_CTL(data)
-
-    def FIFO_Mode_Stream(self):
-        '''Sets the FIFO buffer to stream mode'''
-
-        reg_value   = self.get_FIFO_CTL()
+    def set_fifo_mode(self, mode):
+        '''Sets the FIFO buffer to the mode given by @param mode. The options for @param mode
+            are as follows:
+
+                FIFO_MODE_Bypass    = 0b00000000 (the FIFO buffer is bypassed (ignored))
+                FIFO_MODE_FIFO      = 0b01000000
+                FIFO_MODE_Stream    = 0b10000000
+                FIFO_MODE_Trigger   = 0b11000000
+        '''
+        reg_value   = self.shadow[_FIFO_CTL]
         reg_value   = reg_value & 0b00111111 # Clears the two most significant bits
-        data        = reg_value + self.FIFO_MODE_Stream # Add bit mask to set two most significant bits
-        self.set_FIFO_CTL(data)
+        data        = reg_value | mode # Add bit mask to set two most significant bits
+        self.mem_write(_FIFO_CTL, data)
 
-    def FIFO_Mode_Trigger(self):
-        '''Sets the FIFO buffer to trigger mode'''
-
-        reg_value   = self.get_FIFO_CTL()
-        reg_value   = reg_value & 0b00111111 # Clears the two most significant bits
-        data        = reg_value + self.FIFO_MODE_Trigger # Add bit mask to set two most significant bits
-        self.set_FIFO_CTL(data)
+    # Short versions of set_fifo_mode() for each mode
+    FIFO_Mode_Bypass    = lambda self: self.set_fifo_mode(_FIFO_MODE_Bypass)
+    FIFO_Mode_FIFO      = lambda self: self.set_fifo_mode(_FIFO_MODE_FIFO)
+    FIFO_Mode_Stream    = lambda self: self.set_fifo_mode(_FIFO_MODE_Stream)
+    FIFO_Mode_Trigger   = lambda self: self.set_fifo_mode(_FIFO_MODE_Trigger)
 
     def trigger_int1(self):
         '''Links the trigger output to pin INT1'''
 
-        reg_value   = self.get_FIFO_CTL()
-        data        = reg_value & ~self.Trigger # Sets the trigger bit to 0
-        self.set_FIFO_CTL(data)
+        reg_value   = self.shadow[_FIFO_CTL]
+        data        = reg_value & ~_Trigger # Sets the trigger bit to 0
+        self.mem_write(_FIFO_CTL, data)
 
     def trigger_int2(self):
         '''Links the trigger output to pin INT2'''
 
-        reg_value   = self.get_FIFO_CTL()
-        data        = reg_value | self.Trigger # Sets the trigger bit to 1
-        self.set_FIFO_CTL(data)
+        reg_value   = self.shadow[_FIFO_CTL]
+        data        = reg_value | _Trigger # Sets the trigger bit to 1
+        self.mem_write(_FIFO_CTL, data)
 
-    def set_samples(self, num):
-        '''Sets the number of samples given by @param num. @param num can be any number from 0 to 32. If @param num is greater than
-            32, it is automatically set to 32. If @param num is less than 0, it is automatically set to 0.
+    @micropython.viper
+    def set_samples(self, num: int):
+        '''Sets the number of samples given by @param num. @param num can be any number from 0 to 31. If @param num is greater than
+            31, it is automatically set to 31. If @param num is less than 0, it is automatically set to 0. The samples
+            field is only 5 bits wide, so a value of 32 would set the trigger bit instead.
             The function of the samples number depends on the FIFO mode selected:
 
             FIFO MODE:              SAMPLES FUNCTION:
@@ -630,21 +1123,68 @@ class ADXL375:
             Stream                  Specifies how many FIFO entries are needed to trigger a watermark interrupt.
             Trigger                 Specifies how many FIFO samples are retained in the FIFO buffer before a trigger event.
         '''
-        if num > 32:
-            num = 32
+        if num > 31:
+            num = 31
         if num < 0:
             num = 0
 
-        reg_value   = self.get_FIFO_CTL()
+        reg_value   = int(ptr8(self.shadow)[_FIFO_CTL])
         reg_value   = reg_value & 0b11100000 # Clears the least significant five bits
-        data        = reg_value + num # Set the samples bits according to the value given by num
-        self.set_FIFO_CTL(data)
+        data        = reg_value | num # Set the samples bits according to the value given by num
+        self.mem_write(_FIFO_CTL, data)
 
 
     # Register 0x39-FIFO_STATUS (Read only) bits
     # FIFO_TRIG           = micropython.const(0b10000000)
 
 
+    # -------------------------------------
+    # FIFO DATA
+    # -------------------------------------
+    def read_fifo(self, num):
+        '''Reads @param num samples out of the FIFO buffer. @param num can be any number from
+            0 to 32. The raw values of the samples are stored per axis in @param x, @param y
+            and @param z (sample i is x[i], y[i], z[i]). The values are kept raw so that the
+            acquisition path never creates floats. Multiply them by SCALE_FACTOR (or use
+            to_mg()) when they are displayed or exported.
+
+            @return the tuple (x, y, z). The arrays are reused by the next call.
+        '''
+        num = self.drain_fifo(num, self.fifo_raw)
+        decode_fifo(self.fifo_raw, self.fifo_data, num)
+
+        return self.xyz
+
+    def get_fifo_count(self):
+        '''This function returns the number of samples stored in the FIFO buffer (0 to 32),
+            read from FIFO_STATUS in a single transaction.
+        '''
+        return self.get_FIFO_STATUS() & 0b00111111 # Entries bits
+
+    @micropython.viper
+    def drain_fifo(self, num: int, out) -> int:
+        '''Reads @param num samples out of the FIFO buffer into @param out, a bytearray that
+            holds at least 6*num bytes. Each sample is read with one multi-byte read of the six
+            data registers and takes 6 bytes in @param out (X0, X1, Y0, Y1, Z0, Z1), the same
+            layout decode_fifo() expects. @param num is limited to 32. This is the only
+            function that reads the FIFO buffer; read_fifo() is built on it.
+
+            @return the number of samples read
+        '''
+        if num > _FIFO_DEPTH:
+            num = _FIFO_DEPTH
+
+        # Bind the method and function to locals once, so the loop doesn't have to
+        # look them up on every sample.
+        read_xyz_into   = self.read_xyz_into
+        sleep_us        = utime.sleep_us
+
+        for i in range(num):
+            read_xyz_into(out, 6*i)
+            sleep_us(5) # The FIFO needs 5 us after CS goes high to pop the next sample (see datasheet)
+        return num
+
+
 
 
 
@@ -658,11 +1198,6 @@ class ADXL375:
     # TESTING FUNCTIONS
     # -------------------------------------
 
-    def config(self):
-        '''This function puts the accelerometer into configuration mode. Note that this
-            is the default state when the accelerometer first starts up
-        '''
-
     def test_read(self):
         '''This function reads the device ID over and over to test if it works.'''
         print('1')
@@ -704,267 +1239,30 @@ class ADXL375:
 
 
     # -------------------------------------
-    # 'GETTER' FUNCTIONS
+    # REGISTER ACCESS ('GETTER' AND 'SETTER' FUNCTIONS)
     # -------------------------------------
+    # get_<REGISTER>() and set_<REGISTER>(data) are not written out for every
+    # register. add_register_functions() (below the class) adds them for
+    # every register in READ_REGISTERS and WRITE_REGISTERS when the module is
+    # imported, which keeps the bytecode of the driver small. Only the
+    # registers that are polled (DEVID, INT_SOURCE and FIFO_STATUS) have their
+    # own function, which reads them with a prebuilt transmit buffer.
+    def read_reg(self, mem_addr):
+        '''This function returns the value of the register at the address specified by @param mem_addr.'''
+        self.mem_read(mem_addr)
+        return self.buf[1]
 
     def get_DEVID(self):
         '''This function returns the device ID'''
-        self.mem_read(self.DEVID)
-        return self.buf[1]
-
-    def get_THRESH_SHOCK(self):
-        '''This function returns the shock threshold value'''
-        self.mem_read(self.THRESH_SHOCK)
-        return self.buf[1]
-
-    def get_OFSX(self):
-        '''This function returns the x-axis offset'''
-        self.mem_read(self.OFSX)
-        return self.buf[1]
-
-    def get_OFSY(self):
-        '''This function returns the y-axis offset'''
-        self.mem_read(self.OFSY)
-        return self.buf[1]
-
-    def get_OFSZ(self):
-        '''This function returns the z-axis offset'''
-        self.mem_read(self.OFSZ)
-        return self.buf[1]
-
-    def get_DUR(self):
-        '''This function returns the shock duration'''
-        self.mem_read(self.DUR)
-        return self.buf[1]
-
-    def get_Latent(self):
-        '''This function returns the shock latency'''
-        self.mem_read(self.Latent)
-        return self.buf[1]
-
-    def get_Window(self):
-        '''This function returns the shock Window'''
-        self.mem_read(self.Window)
-        return self.buf[1]
-
-    def get_THRESH_ACT(self):
-        '''This function returns the activity threshold'''
-        self.mem_read(self.THRESH_ACT)
-        return self.buf[1]
-
-    def get_THRESH_INACT(self):
-        '''This function returns the inactivity threshold'''
-        self.mem_read(self.THRESH_INACT)
-        return self.buf[1]
-
-    def get_TIME_INACT(self):
-        '''This function returns the inactivity time'''
-        self.mem_read(self.TIME_INACT)
-        return self.buf[1]
-
-    def get_ACT_INACT_CTL(self):
-        '''This function returns the axis enable control for activity and inactivity detection'''
-        self.mem_read(self.ACT_INACT_CTL)
-        return self.buf[1]
-
-    def get_SHOCK_AXES(self):
-        '''This function returns the axis control for single shock/double shock'''
-        self.mem_read(self.SHOCK_AXES)
-        return self.buf[1]
-
-    def get_ACT_SHOCK_STATUS(self):
-        '''This function returns the source of single shock/double shock'''
-        self.mem_read(self.ACT_SHOCK_STATUS)
-        return self.buf[1]
-
-    def get_BW_RATE(self):
-        '''This function returns the data rate and power mode control'''
-        self.mem_read(self.BW_RATE)
-        return self.buf[1]
-
-    def get_POWER_CTL(self):
-        '''This function returns the power saving control feature'''
-        self.mem_read(self.POWER_CTL)
-        return self.buf[1]
-
-    def get_INT_ENABLE(self):
-        '''This function returns the interrupt enable control value'''
-        self.mem_read(self.INT_ENABLE)
-        return self.buf[1]
-
-    def get_INT_MAP(self):
-        '''This function returns the interrupt mapping contol'''
-        self.mem_read(self.INT_MAP)
-        return self.buf[1]
+        return self.fast_read(self.hdr_devid)
 
     def get_INT_SOURCE(self):
-        '''This function returns the interrupt source'''
-        self.mem_read(self.INT_SOURCE)
-        return self.buf[1]
-
-    def get_DATA_FORMAT(self):
-        '''This function returns the data format'''
-        self.mem_read(self.DATA_FORMAT)
-        return self.buf[1]
-
-    def get_DATAX0(self):
-        '''This function returns the first byte of the x-axis accelerometer data'''
-        self.mem_read(self.DATAX0)
-        return self.buf[1]
-
-    def get_DATAX1(self):
-        '''This function returns the second byte of the x-axis accelerometer data'''
-        self.mem_read(self.DATAX1)
-        return self.buf[1]
-
-    def get_DATAY0(self):
-        '''This function returns the first byte of the y-axis accelerometer data'''
-        self.mem_read(self.DATAY0)
-        return self.buf[1]
-
-    def get_DATAY1(self):
-        '''This function returns the second byte of the y-axis accelerometer data'''
-        self.mem_read(self.DATAY1)
-        return self.buf[1]
-
-    def get_DATAZ0(self):
-        '''This function returns the first byte of the z-axis accelerometer data'''
-        self.mem_read(self.DATAZ0)
-        return self.buf[1]
-
-    def get_DATAZ1(self):
-        '''This function returns the second byte of the z-axis accelerometer data'''
-        self.mem_read(self.DATAZ1)
-        return self.buf[1]
-
-    def get_FIFO_CTL(self):
-        '''This function returns the FIFO control'''
-        self.mem_read(self.FIFO_CTL)
-        return self.buf[1]
+        '''This function returns the source of interrupts'''
+        return self.fast_read(self.hdr_int_source)
 
     def get_FIFO_STATUS(self):
         '''This function returns the FIFO status'''
-        self.mem_read(self.FIFO_STATUS)
-        return self.buf[1]
-
-    # -------------------------------------
-    # 'SETTER' FUNCTIONS
-    # -------------------------------------
-    def set_THRESH_SHOCK(self, data):
-        '''This function sets the shock threshold value with the data
-            specified in @param data.
-        '''
-        self.mem_write(self.THRESH_SHOCK, data)
-
-    def set_OFSX(self, data):
-        '''This function sets the x-axis offset with the data
-            specified in @param data
-        '''
-        self.mem_write(self.OFSXF, data)
-
-    def set_OFSY(self, data):
-        '''This function sets the y-axis offset with the data
-            specified in @param data
-        '''
-        self.mem_write(self.OFSXY, data)
-
-    def set_OFSZ(self, data):
-        '''This function sets the z-axis offset with the data
-            specified in @param data
-        '''
-        self.mem_write(self.OFSXZ, data)
-
-    def set_DUR(self, data):
-        '''This function sets the shock duration with the data
-            specified in @param data
-        '''
-        self.mem_write(self.DUR, data)
-
-    def set_Latent(self, data):
-        '''This function sets the shock latency with the data
-            specified in @param data
-        '''
-        self.mem_write(self.Latent, data)
-
-    def set_Window(self, data):
-        '''This function sets the shock Window with the data
-            specified in @param data
-        '''
-        self.mem_write(self.Window, data)
-
-    def set_THRESH_ACT(self, data):
-        '''This function sets the activity threshold with the data
-            specified in @param data
-        '''
-        self.mem_write(self.THRESH_ACT, data)
-
-    def set_THRESH_INACT(self, data):
-        '''This function sets the inactivity threshold with the data
-            specified in @param data
-        '''
-        self.mem_write(self.THRESH_INACT, data)
-
-    def set_TIME_INACT(self, data):
-        '''This function sets the inactivity time with the data
-            specified in @param data
-        '''
-        self.mem_write(self.TIME_INACT, data)
-
-    def set_ACT_INACT_CTL(self, data):
-        '''This function sets the axis enable control for activity and inactivity detection with the data
-            specified in @param data
-        '''
-        self.mem_write(self.ACT_INACT_CTL, data)
-
-    def set_SHOCK_AXES(self, data):
-        '''This function sets the axis control for single shock/double shock with the data
-            specified in @param data
-        '''
-        self.mem_write(self.SHOCK_AXES, data)
-
-    def set_BW_RATE(self, data):
-        '''This function sets the data rate and power mode control with the data
-            specified in @param data
-        '''
-        self.mem_write(self.BW_RATE, data)
-
-    def set_POWER_CTL(self, data):
-        '''This function sets the power saving control feature with the data
-            specified in @param data
-        '''
-        self.mem_write(self.POWER_CTL, data)
-
-    def set_INT_ENABLE(self, data):
-        '''This function sets the interrupt enable control value with the data
-            specified in @param data
-        '''
-        self.mem_write(self.INT_ENABLE, data)
-
-    def set_INT_MAP(self, data):
-        '''This function sets the interrupt mapping contol with the data
-            specified in @param data
-        '''
-        self.mem_write(self.INT_MAP, data)
-
-    def set_DATA_FORMAT(self, data):
-        '''This function sets the data format with the data
-            specified in @param data
-        '''
-        self.mem_write(self.DATA_FORMAT, data)
-
-    def set_FIFO_CTL(self, data):
-        '''This function sets the FIFO control'''
-        self.mem_write(self.FIFO_CTL, data)
-
-
-
-
-
-
-
-
-
-
+        return self.fast_read(self.hdr_fifo_status)
 
 
 
@@ -976,3 +1274,29 @@ class ADXL375:
 
 
 
+#=========================================================================
+# REGISTER ACCESS FUNCTIONS
+#=========================================================================
+def make_getter(mem_addr):
+    '''@return a function that reads the register at the address specified by @param mem_addr'''
+    return lambda self: self.read_reg(mem_addr)
+
+def make_setter(mem_addr):
+    '''@return a function that writes its argument to the register at the address specified
+        by @param mem_addr'''
+    return lambda self, data: self.mem_write(mem_addr, data)
+
+def add_register_functions(cls):
+    '''This function adds get_<REGISTER>() for every register in READ_REGISTERS and
+        set_<REGISTER>(data) for every register in WRITE_REGISTERS to the class @param cls.
+        Functions the class already defines are kept. The register address is stored in
+        the function itself, so a call doesn't need to look the register up.
+    '''
+    for name in READ_REGISTERS:
+        if not hasattr(cls, 'get_' + name):
+            setattr(cls, 'get_' + name, make_getter(READ_REGISTERS[name]))
+    for name in WRITE_REGISTERS:
+        if not hasattr(cls, 'set_' + name):
+            setattr(cls, 'set_' + name, make_setter(WRITE_REGISTERS[name]))
+
+add_register_functions(ADXL375)
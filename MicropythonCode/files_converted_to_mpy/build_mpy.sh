@@ -0,0 +1,51 @@
+#!/bin/sh
+# BUILD MPY
+#=========================================================================
+# @file build_mpy.sh
+#=========================================================================
+# ABOUT:
+# This script cross compiles the *.py files in this folder into the *.mpy
+# files that get loaded onto the board (one folder up). The board only
+# has to load the precompiled bytecode instead of lexing, parsing and
+# compiling the source on every import, which saves RAM and boot time.
+#
+# USAGE:
+#   ./build_mpy.sh
+#   MPY_CROSS="python -m mpy_cross" ./build_mpy.sh
+#
+# The mpy-cross version MUST match the firmware on the board. The
+# PyBoard firmware in this project is v1.12, which loads mpy v5 files.
+#=========================================================================
+# WRITTEN BY: Steven Waal
+# DATE: 10.15.2026
+#=========================================================================
+# COPYRIGHT:
+# @copyright This program is copyrighted by Steven Waal and released under
+# the GNU Public License, version 3.0.
+#=========================================================================
+
+MPY_CROSS=${MPY_CROSS:-mpy-cross}
+
+# Compiler flags
+# -O3              : Disables assertions and source line numbers to shrink the bytecode
+# -march=armv7emsp : Target of @micropython.native/viper functions (STM32F405)
+# Do NOT add -mno-unicode: the firmware is built with unicode support and
+# refuses to load *.mpy files compiled without it. Docstrings don't need a
+# flag either, MicroPython never stores them.
+MPY_FLAGS="-O3 -march=armv7emsp"
+
+# Files to convert (without the *.py extension)
+MODULES="ADXL375_driver ht16k33_matrix ht16k33_seg"
+
+cd "$(dirname "$0")" || exit 1
+
+# Make sure the compiler emits the same mpy version the firmware expects
+if ! $MPY_CROSS --version | grep -q "mpy v5"; then
+    echo "ERROR: $MPY_CROSS does not emit mpy v5 (MicroPython v1.12)"
+    exit 1
+fi
+
+for module in $MODULES; do
+    echo "$module.py -> ../$module.mpy"
+    $MPY_CROSS $MPY_FLAGS -o "../$module.mpy" "$module.py" || exit 1
+done
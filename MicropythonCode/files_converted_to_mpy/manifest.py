@@ -0,0 +1,32 @@
+# FROZEN MODULES MANIFEST
+#=========================================================================
+# @file manifest.py
+#=========================================================================
+# ABOUT:
+# This manifest freezes the drivers in this folder into the PyBoard 
+# firmware. Frozen modules are compiled into the firmware image and run 
+# straight from flash, so importing them doesn't use any RAM for the 
+# bytecode (unlike the *.mpy files, which are loaded into RAM).
+#
+# USAGE (from ports/stm32 of the MicroPython v1.12 source):
+#   make BOARD=PYBV11 FROZEN_MANIFEST=/path/to/manifest.py
+#
+# Flash the resulting build-PYBV11/firmware.dfu to the board. Frozen 
+# modules are found before files on the board, so the *.mpy files of the
+# frozen drivers don't need to be loaded onto the board anymore.
+#=========================================================================
+# WRITTEN BY: Steven Waal
+# DATE: 10.15.2026
+#=========================================================================
+# COPYRIGHT:
+# @copyright This program is copyrighted by Steven Waal and released under
+# the GNU Public License, version 3.0.
+#=========================================================================
+
+# Modules frozen into the stock PyBoard firmware
+include("$(PORT_DIR)/boards/manifest.py")
+
+# MTB DAQ drivers (paths are relative to this file). opt=3 matches the 
+# -O3 flag used by build_mpy.sh.
+freeze(".", "ADXL375_driver.py", opt=3)
+freeze(".", ("ht16k33_matrix.py", "ht16k33_seg.py"), opt=3)
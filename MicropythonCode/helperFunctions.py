@@ -12,6 +12,20 @@
 # NOTES:
 # 05.28.2020 - File created (SRW)
 # 06.11.2020 - Final comments added, code cleaned up
+# 10.15.2026 - clear_accel_buf() reads each sample with one burst read
+# 10.15.2026 - decode_data() uses NumPy when it is available
+# 10.15.2026 - Acceleration data decoded with struct, removed twos_comp()
+# 10.15.2026 - get_ODR() looks the data rate up in a dictionary
+# 10.15.2026 - Data file lines written with a % format string
+# 10.15.2026 - Data file lines buffered and written in blocks of ~4 KiB
+# 10.15.2026 - decode_data() can decode a buffer instead of 'log.bin'
+# 10.15.2026 - clear_accel_buf() reads FIFO_STATUS only once
+# 10.15.2026 - decode_data() computes acceleration as float32 with NumPy
+# 10.15.2026 - get_ODR() uses the cached BW_RATE register (no SPI read)
+# 10.15.2026 - Data file written in binary mode (no text encoding)
+# 10.15.2026 - Added decode_files() to decode several files in parallel
+# 10.15.2026 - Added read_file_count() and highest_file_number()
+# 10.15.2026 - decode_data() returns without a data file if the log file is missing
 #=========================================================================
 # COPYRIGHT:
 # @copyright This program is copyrighted by Steven Waal and released under 
@@ -27,6 +41,74 @@
 
 
 
+#=========================================================================
+# IMPORT MODULES
+#=========================================================================
+# NumPy is not available on the board. When this file is used on a computer
+# that has NumPy, decode_data() decodes the whole log file at once with it.
+# multiprocessing isn't available on the board either. On a computer, 
+# decode_files() uses it to decode several files at the same time.
+import struct, os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+
+
+
+
+
+
+
+
+
+#=========================================================================
+# CONSTANTS
+#=========================================================================
+# Output data rate [Hz] for each value of the 4 LSB of the BW_RATE register
+# (see the ODR_ constants of the ADXL375 driver)
+ODR_VALUES = {  0b1111: 3200,
+                0b1110: 1600,
+                0b1101: 800,
+                0b1100: 400,
+                0b1011: 200,
+                0b1010: 100,
+                0b1001: 50,
+                0b1000: 25,
+                0b0111: 12.5,
+                0b0110: 6.25,
+                0b0101: 3.13,
+                0b0100: 1.56,
+                0b0011: 0.78,
+                0b0010: 0.39,
+                0b0001: 0.20,
+                0b0000: 0.10    }
+
+# Format of one line of the data file: time to 1 usec, acceleration to 0.1 mg
+# (1 LSB = 48.8 mg). The data file is opened in binary mode and the lines 
+# are formatted as bytes, so they don't have to be encoded when written.
+ROW_FORMAT = b'%.6f, %.4f, %.4f, %.4f, %.4f, %.4f, %.4f\n'
+
+# Number of lines collected before they are written to the data file. One
+# line is ~70 characters, so this writes to the SD card in blocks of ~4 KiB
+ROWS_PER_WRITE = 64
+
+
+
+
+
+
+
+
+
+
 #=========================================================================
 # FUNCTIONS
 #=========================================================================
@@ -39,22 +121,39 @@ def clear_accel_buf(adxl375):
     @return the number of values that were in the FIFO buffer'''
 
 
-    count = 0
+    # The accelerometer is in standby mode, so no samples are added while the
+    # buffer is emptied and FIFO_STATUS only has to be read once.
+    count = adxl375.get_FIFO_STATUS() & 0b00111111 # Number of samples in the buffer
 
-    # Empty buffers from sensors
-    while (adxl375.get_FIFO_STATUS() & 0b00111111): # Loop until buffer is empty
-        adxl375.get_x_acceleration()
-        count += 1
+    # Empty buffers from sensors. A FIFO entry is only popped when CS goes high,
+    # so every sample needs its own read.
+    for i in range(count):
+        adxl375.mem_read_xyz() # Reads X, Y and Z in one transaction, which pops the sample
 
     return count
 
-def decode_data(file_count, adxl375):
-        '''This function decodes the data written to 'log.bin' and saves it to a *.txt file'''
+def decode_data(file_count, adxl375, source='log.bin'):
+        '''This function decodes the data written to 'log.bin' and saves it to a *.txt file.
+            @param source is the name of the binary file to decode, or a bytes-like
+            object (bytes, bytearray, memoryview) that already holds the data. The
+            latter skips reading the data back from the SD card.'''
+
+        # Open binary data file. A buffer is decoded directly. This is done before the
+        # data file is created, so a missing log file doesn't leave an empty data file
+        logFile = None
+        if isinstance(source, str):
+            try:
+                logFile = open(source, 'rb')
+            except OSError:
+                print("ERROR: LOG FILE DOES NOT EXIST")
+                return
+        else:
+            source = memoryview(source) # Slicing a memoryview doesn't copy the data
 
         # Create data file using file count
-        dataFile = open('data' + str(file_count) +'.txt', 'w')
+        dataFile = open('data' + str(file_count) +'.txt', 'wb')
         # Write header of data file
-        dataFile.write('{}, {}, {}, {}, {}, {}, {}'.format('TIME (sec)', 'X1_ACCEL (g)', 'Y1_ACCEL (g)', 'Z1_ACCEL (g)', 'X2_ACCEL (g)', 'Y2_ACCEL (g)', 'Z2_ACCEL (g)') + '\n')
+        dataFile.write(b'TIME (sec), X1_ACCEL (g), Y1_ACCEL (g), Z1_ACCEL (g), X2_ACCEL (g), Y2_ACCEL (g), Z2_ACCEL (g)\n')
        
         SCALE_FACTOR = adxl375.SCALE_FACTOR
 
@@ -62,68 +161,129 @@ def decode_data(file_count, adxl375):
         time = 0 # Overall time that data was taken
         deltaTime = round((1/get_ODR(adxl375)), 6) # Difference in time from one data point to the next. Dependent on ODR of accelerometer. Rounded to 6 decimal places
 
-        # Open binary data file
-        try:
-            logFile = open('log.bin', 'rb')
-        except:
-            print("ERROR: LOG FILE DOES NOT EXIST")
+        if np is not None:
+            # Each record is 14 bytes: for each accelerometer one byte that was received
+            # while the read command was sent, followed by X, Y, Z as signed 16 bit values (LSB first)
+            record = np.dtype([('pad1', 'u1'), ('xyz1', '<i2', 3), ('pad2', 'u1'), ('xyz2', '<i2', 3)])
+            if logFile is None:
+                data = np.frombuffer(source, dtype=record, count=len(source)//record.itemsize)
+            else:
+                data = np.fromfile(logFile, dtype=record)
+
+            # Acceleration is computed as float32, which halves the memory needed for long
+            # recordings. float32 resolves about 0.0001 g at 1600 g, far below 1 LSB (0.0488 g),
+            # so the last decimal may differ from the loop below. Time stays float64 to keep
+            # its 1 usec resolution in long recordings.
+            SF32 = np.float32(SCALE_FACTOR)
+            axes = ('X1', 'Y1', 'Z1', 'X2', 'Y2', 'Z2')
+            columns = np.empty(len(data), dtype=[('TIME', '<f8')] + [(axis, '<f4') for axis in axes])
+            columns['TIME'] = np.arange(len(data))*deltaTime
+            for i in range(3):
+                columns[axes[i]] = data['xyz1'][:, i]*SF32
+                columns[axes[i+3]] = data['xyz2'][:, i]*SF32
+            np.savetxt(dataFile, columns, fmt=ROW_FORMAT[:-1].decode()) # savetxt adds the newline itself
+
+            if logFile is not None:
+                logFile.close() # Close file when finished
+            dataFile.close() # Close file when finished
+            return
+
+        rows = [] # Lines waiting to be written to the data file
+        offset = 0 # Position in the buffer when decoding a buffer
 
         while True:
-            line = logFile.read(14) # Read 14 bytes at a time (2 bytes for two read command, 6 bytes for each accelerometer X, Y, Z data)
+            if logFile is None:
+                line = source[offset:offset+14]
+                offset += 14
+            else:
+                line = logFile.read(14) # Read 14 bytes at a time (2 bytes for two read command, 6 bytes for each accelerometer X, Y, Z data)
 
-            if not line:
+            if len(line) < 14:
                 break;
 
-            # ADXL375_1
-            X1_LSB = line[1]
-            X1_MSB = line[2]
-            Y1_LSB = line[3]
-            Y1_MSB = line[4]
-            Z1_LSB = line[5]
-            Z1_MSB = line[6]
+            # Each accelerometer: one byte that was received while the read command was sent,
+            # then X, Y, Z as signed 16 bit values (LSB first)
+            X1_DATA, Y1_DATA, Z1_DATA = struct.unpack_from('<hhh', line, 1) # ADXL375_1
+            X2_DATA, Y2_DATA, Z2_DATA = struct.unpack_from('<hhh', line, 8) # ADXL375_2
 
-            X1_DATA = (X1_MSB << 8) + X1_LSB
-            Y1_DATA = (Y1_MSB << 8) + Y1_LSB
-            Z1_DATA = (Z1_MSB << 8) + Z1_LSB
+            X1_ACCEL = X1_DATA*SCALE_FACTOR
+            Y1_ACCEL = Y1_DATA*SCALE_FACTOR
+            Z1_ACCEL = Z1_DATA*SCALE_FACTOR
+            X2_ACCEL = X2_DATA*SCALE_FACTOR
+            Y2_ACCEL = Y2_DATA*SCALE_FACTOR
+            Z2_ACCEL = Z2_DATA*SCALE_FACTOR
 
-            X1_ACCEL = twos_comp(X1_DATA, 16)*SCALE_FACTOR
-            Y1_ACCEL = twos_comp(Y1_DATA, 16)*SCALE_FACTOR
-            Z1_ACCEL = twos_comp(Z1_DATA, 16)*SCALE_FACTOR
+            rows.append(ROW_FORMAT % (time, X1_ACCEL, Y1_ACCEL, Z1_ACCEL, X2_ACCEL, Y2_ACCEL, Z2_ACCEL))
 
-            # ADXL375_2
-            X2_LSB = line[8]
-            X2_MSB = line[9]
-            Y2_LSB = line[10]
-            Y2_MSB = line[11]
-            Z2_LSB = line[12]
-            Z2_MSB = line[13]
-
-            X2_DATA = (X2_MSB << 8) + X2_LSB
-            Y2_DATA = (Y2_MSB << 8) + Y2_LSB
-            Z2_DATA = (Z2_MSB << 8) + Z2_LSB
-
-            X2_ACCEL = twos_comp(X2_DATA, 16)*SCALE_FACTOR
-            Y2_ACCEL = twos_comp(Y2_DATA, 16)*SCALE_FACTOR
-            Z2_ACCEL = twos_comp(Z2_DATA, 16)*SCALE_FACTOR
-
-            dataFile.write('{}, {}, {}, {}, {}, {}, {}'.format(time, X1_ACCEL, Y1_ACCEL, Z1_ACCEL, X2_ACCEL, Y2_ACCEL, Z2_ACCEL) + '\n')
+            if len(rows) == ROWS_PER_WRITE: # Write a whole block at once
+                dataFile.write(b''.join(rows))
+                rows.clear()
 
             time = time + deltaTime
 
-        logFile.close() # Close file when finished
+        dataFile.write(b''.join(rows)) # Write the remaining lines
+
+        if logFile is not None:
+            logFile.close() # Close file when finished
 
         dataFile.close() # Close file when finished
 
-def twos_comp(val, bits):
-    '''Computes the 2's complement value of @param val, a binary number of length @param bits. 
-       @return The 2's complement value of @param val. The acceleration data stored in the registers
-       is stored as 2's complement format. Therefore, this function is needed in order to properly 
-       interpret the acceleration data from the accelerometer.
+def decode_files(file_counts, adxl375, processes=None):
+    '''This function decodes the binary data files of the recordings given by @param file_counts
+        (e.g. [1, 2, 3] for 'data1.bin', 'data2.bin' and 'data3.bin') with decode_data(). On a
+        computer every file is decoded in its own process, @param processes sets the number of
+        processes (default: one per CPU). Without multiprocessing the files are decoded one
+        after another.
     '''
-    if (val & (1 << (bits - 1))) != 0: # if sign bit is set e.g., 8bit: 128-255
-        val     = val - (1 << bits)        # compute negative value
-    return val                         # return positive value as is
+    # The settings are copied into a LogSettings object, which (unlike an ADXL375 object)
+    # can be sent to the other processes.
+    settings = LogSettings(adxl375)
+    jobs = [(file_count, settings, 'data' + str(file_count) + '.bin') for file_count in file_counts]
+
+    if multiprocessing is None or len(jobs) < 2:
+        for job in jobs:
+            decode_data(*job)
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        pool.starmap(decode_data, jobs)
+
+def read_file_count(path):
+    '''This function reads the file count stored in the file @param path. Blank or garbled
+        lines (e.g. when power was lost while the file was written) are skipped and the
+        last number in the file is used.
+
+        @return the file count, or None if the file doesn't exist or holds no number'''
+
+    try:
+        countFile = open(path, 'r')
+    except OSError:
+        return None
+
+    count = None
+    for line in countFile:
+        try:
+            count = int(line)
+        except ValueError:
+            pass # Blank or garbled line
+    countFile.close()
+
+    return count
+
+def highest_file_number(path):
+    '''This function looks for the recordings ('dataN.bin' and 'dataN.err') in the
+        directory @param path.
+
+        @return the highest recording number N, or 0 if there are no recordings'''
 
+    highest = 0
+    for name in os.listdir(path):
+        if name[:4] == 'data' and (name[-4:] == '.bin' or name[-4:] == '.err'):
+            try:
+                highest = max(highest, int(name[4:-4]))
+            except ValueError:
+                pass # Not a recording
+    return highest
 
 def get_ODR(adxl375):
     '''This function returns the output data rate of the desired
@@ -149,27 +309,29 @@ def get_ODR(adxl375):
         ODR_0_10HZ          = micropython.const(0b00000000)
     '''
     
-    ODR = (adxl375.get_BW_RATE() & 0b00001111) # The 4 LSB of this value correspond to the output data rate
-
-    ODR_VALUES = [  [3200, 0b1111],
-                    [1600, 0b1110],
-                    [800, 0b1101],
-                    [400, 0b1100],
-                    [200, 0b1011],
-                    [100, 0b1010],
-                    [50, 0b1001],
-                    [25, 0b1000],
-                    [12.5, 0b0111],
-                    [6.25, 0b0110],
-                    [3.13, 0b0101],
-                    [1.56, 0b0100],
-                    [0.78, 0b0011],
-                    [0.39, 0b0010],
-                    [0.20, 0b0001],
-                    [0.10, 0b0000]   ]
-
-    for value in ODR_VALUES:
-        if ODR == value[1]:
-            return value[0]
-
-    return False
+    # The driver keeps a copy of BW_RATE (shadow register) that is updated by every write
+    # to the register, so it doesn't have to be read over SPI.
+    ODR = (adxl375.shadow[adxl375.BW_RATE] & 0b00001111) # The 4 LSB of this value correspond to the output data rate
+
+    return ODR_VALUES.get(ODR, False)
+
+
+
+
+
+
+
+
+
+
+#=========================================================================
+# CLASSES
+#=========================================================================
+class LogSettings:
+    '''Holds the settings of an ADXL375 object that decode_data() needs (scale factor and
+        BW_RATE register). It is used by decode_files() to pass them to other processes.
+    '''
+    def __init__(self, adxl375):
+        self.SCALE_FACTOR   = adxl375.SCALE_FACTOR
+        self.BW_RATE        = adxl375.BW_RATE
+        self.shadow         = bytes(adxl375.shadow)
@@ -26,6 +26,33 @@
 #              presence of micro SD card.
 # 05.23.2020 - Adapted code to work with MTB DAQ v2.2 main board.
 # 06.11.2020 - Final comments added, code cleaned up
+# 10.15.2026 - Sleep with pyb.wfi() while waiting for the watermark
+#              interrupt instead of spinning on the INT1 pin.
+# 10.15.2026 - Both accelerometers buffer their samples in the FIFO
+#              (stream mode).
+# 10.15.2026 - Accelerometer settings are written in one go with
+#              begin_config()/end_config().
+# 10.15.2026 - Record loop reads both accelerometers with a viper function
+#              that toggles the chip select pins at fixed addresses.
+# 10.15.2026 - Both accelerometers are read into one 14 byte record that is
+#              written to the data file with a single write.
+# 10.15.2026 - All records of one FIFO watermark are collected in drain_buf
+#              and written to the data file at once.
+# 10.15.2026 - Garbage collector is disabled while recording.
+# 10.15.2026 - Sleep with pyb.wfi() while waiting for the record button.
+# 10.15.2026 - FIFO buffers drained by one viper function (drain_both_fifos()).
+# 10.15.2026 - FIFO buffers drained in the INT1 interrupt into two
+#              alternating buffers (ping-pong) that the record loop writes
+#              to the SD card.
+# 10.15.2026 - count.txt only holds the current file count.
+# 10.15.2026 - Functions used by the record loop bound to names up front.
+# 10.15.2026 - Data file written in blocks of 4096 bytes (sd_buf).
+# 10.15.2026 - count.txt replaced through count.tmp. A missing or damaged
+#              count file no longer stops the program from starting.
+# 10.15.2026 - Chip select registers of drain_both_fifos() taken from the
+#              Pin objects instead of fixed constants.
+# 10.15.2026 - Recording stops if the INT1 interrupt stops draining the FIFO
+#              buffers (data file renamed to *.err).
 #=========================================================================
 # COPYRIGHT:
 # @copyright This program is copyrighted by Steven Waal and released under 
@@ -73,13 +100,15 @@ from ADXL375_driver import ADXL375
 from ht16k33_seg import Seg14x4
 
 # # GENERAL MICROPYTHON MODULES
-import micropython, pyb, utime, gc, machine, os
+import micropython, pyb, utime, gc, machine, os, array, stm
+from micropython import const
 
 # MISC.
 from helperFunctions import clear_accel_buf
 from helperFunctions import decode_data
-from helperFunctions import twos_comp
 from helperFunctions import get_ODR
+from helperFunctions import read_file_count
+from helperFunctions import highest_file_number
 
 
 
@@ -113,9 +142,18 @@ micropython.alloc_emergency_exception_buf(100)
 # DEFINE ACCELEROMETER PARAMETERS
 #=========================================================================
 # Determines how many data points are stored in the FIFO buffer before an 
-# an interrupt is generatred. Maximum is 32.
+# an interrupt is generatred. Maximum is 32. The remaining 12 entries
+# (7.5 msec at 1600Hz) give the SD card time to finish a slow write before
+# the FIFO buffer overflows.
 FIFO_BUFF_COUNT     = micropython.const(20)
 
+# SPI clock. 5 MHz is the maximum of the ADXL375. The SPI1 clock can only
+# be the 84 MHz bus clock divided by a power of 2, and pyb.SPI picks the
+# fastest one that isn't above the requested rate: 84 MHz/32 = 2.625 MHz
+# (84 MHz/16 = 5.25 MHz is out of spec). One 7 byte read of X, Y and Z
+# takes about 21 usec on the wire. print(spi_1) shows the actual rate.
+SPI_BAUDRATE        = micropython.const(5000000)
+
 
 
 
@@ -128,9 +166,35 @@ FIFO_BUFF_COUNT     = micropython.const(20)
 #=========================================================================
 # DEFINE BUFFERS
 #=========================================================================
+# The ADXL375 only pops a FIFO entry when the chip select pin goes high, so
+# every sample needs its own read. Both reads go into the two halves of one
+# 14 byte record, which keeps the record format of the data file. The
+# records of one FIFO watermark are collected in a drain buffer and written
+# with a single file write. There are two drain buffers: the INT1 interrupt
+# fills one while the record loop writes the other one to the SD card (see
+# CREATE INTERRUPT OBJECTS). Slicing a memoryview allocates, so the views
+# into the drain buffers are made here once instead of in the interrupt.
 CMD_RD      = bytearray((0b11110010, 0, 0, 0, 0, 0, 0)) # ADXL375_1. Command to read multiple bytes starting with X data
-buf1_7      = bytearray(7) # Buffer of ADXL375_1. Make buffer large enough to read data from X, Y, and Z
-buf2_7      = bytearray(7) # Buffer of ADXL375_2. Make buffer large enough to read data from X, Y, and Z
+drain_bufs  = (bytearray(FIFO_BUFF_COUNT*14), bytearray(FIFO_BUFF_COUNT*14)) # Records of ADXL375_1 and ADXL375_2 for one FIFO watermark
+buf1_slots  = tuple([memoryview(buf)[i*14:i*14+7] for i in range(FIFO_BUFF_COUNT)] for buf in drain_bufs) # Buffers of ADXL375_1 (X, Y, and Z)
+buf2_slots  = tuple([memoryview(buf)[i*14+7:i*14+14] for i in range(FIFO_BUFF_COUNT)] for buf in drain_bufs) # Buffers of ADXL375_2 (X, Y, and Z)
+drain_ready = bytearray(2) # 1 if the drain buffer is full and has not been written yet
+fill_index  = 0 # Drain buffer the interrupt fills next
+write_index = 0 # Drain buffer the record loop writes next
+
+# The SD card is written in whole blocks of 4096 bytes (8 sectors of 512
+# bytes). Writes that don't fill whole sectors make the file system read,
+# change and write back the same sector several times. The record loop
+# copies the drain buffers into sd_buf, a ring of two halves. As soon as a
+# half is full it is written to the data file, while the next drain buffers
+# go into the other half. Whatever is left when recording stops is written
+# last. The data file is the same stream of 14 byte records as before.
+DRAIN_BYTES         = FIFO_BUFF_COUNT*14 # Size of one drain buffer
+_SD_BLOCK           = const(4096) # Size of one write to the SD card
+_SD_RING_MASK       = const(2*_SD_BLOCK - 1) # Index mask of sd_buf
+sd_buf      = bytearray(2*_SD_BLOCK)
+sd_halves   = (memoryview(sd_buf)[:_SD_BLOCK], memoryview(sd_buf)[_SD_BLOCK:])
+sd_pos      = 0 # Index in sd_buf where the next drain buffer is copied to
 
 
 
@@ -169,6 +233,77 @@ ADXL1_INT1              = pyb.Pin(pyb.Pin.cpu.C0, pyb.Pin.IN, pyb.Pin.PULL_DOWN)
 
 
 
+#=========================================================================
+# FAST ACCELEROMETER READ
+#=========================================================================
+# drain_both_fifos() toggles the chip select pins by writing straight to
+# the bit set/reset register (BSRR) of their GPIO port instead of going
+# through the Pin objects. The addresses and bit masks are taken from the
+# Pin objects above (the same way the ADXL375 driver does it), so they
+# follow the pins if these are ever changed. They are packed into one
+# array that is passed to drain_both_fifos().
+_CS1_BSRR               = const(0) # Index of the BSRR address of SPI1_CS1
+_CS1_SET                = const(1) # Index of the value that drives SPI1_CS1 high
+_CS1_RESET              = const(2) # Index of the value that drives SPI1_CS1 low
+_CS2_BSRR               = const(3) # Index of the BSRR address of SPI1_CS2
+_CS2_SET                = const(4) # Index of the value that drives SPI1_CS2 high
+_CS2_RESET              = const(5) # Index of the value that drives SPI1_CS2 low
+CS_REGS                 = array.array('I', (SPI1_CS1.gpio() + stm.GPIO_BSRR,
+                                            1 << SPI1_CS1.pin(),
+                                            1 << (SPI1_CS1.pin() + 16),
+                                            SPI1_CS2.gpio() + stm.GPIO_BSRR,
+                                            1 << SPI1_CS2.pin(),
+                                            1 << (SPI1_CS2.pin() + 16)))
+
+@micropython.viper
+def drain_both_fifos(spi, cmd, cs, slots1, slots2, n: int):
+    '''Reads @param n samples from the FIFO buffers of both accelerometers with the
+        command given by @param cmd. The chip select pins are toggled with the registers
+        in @param cs (CS_REGS). Sample i of ADXL375_1 is read into @param slots1[i]
+        and of ADXL375_2 into @param slots2[i]. Everything the loop needs is passed
+        in, so there are no global lookups per sample. This function is called from
+        the INT1 interrupt and must not allocate memory. Calling spi.write_readinto()
+        directly doesn't allocate; storing it in a variable would create a bound method.
+    '''
+    regs = ptr32(cs)
+    bsrr1 = ptr32(regs[_CS1_BSRR])
+    bsrr2 = ptr32(regs[_CS2_BSRR])
+    i = 0
+    while i < n:
+        bsrr1[0] = regs[_CS1_RESET]
+        spi.write_readinto(cmd, slots1[i]) # Read ADXL375_1
+        bsrr1[0] = regs[_CS1_SET]
+        bsrr2[0] = regs[_CS2_RESET]
+        spi.write_readinto(cmd, slots2[i]) # Read ADXL375_2
+        bsrr2[0] = regs[_CS2_SET]
+        i += 1
+
+@micropython.viper
+def ring_copy(ring, pos: int, src, n: int) -> int:
+    '''Copies the first @param n bytes of @param src into @param ring (sd_buf) starting at
+        index @param pos. The copy continues at the start of @param ring when it reaches
+        the end.
+
+        @return the index after the last byte copied
+    '''
+    dst = ptr8(ring)
+    s = ptr8(src)
+    i = 0
+    while i < n:
+        dst[pos] = s[i]
+        pos = (pos + 1) & _SD_RING_MASK
+        i += 1
+    return pos
+
+
+
+
+
+
+
+
+
+
 #=========================================================================
 # CREATE DISPLAY OBJECT
 #=========================================================================
@@ -229,13 +364,8 @@ try:
 except:
     pass
 
-# Check if 'count.txt' was erased. If it was, remake it
-try:
-    file = open('/sd/count/count.txt', 'x') # The 'x' argument indicates that if the file already exists, through an error
-    file.write('0\n')
-    file.close()
-except:
-    pass
+# 'count.txt' is not remade here if it was erased. GET FILE COUNT falls back
+# to the recordings on the SD card and the next recording writes the file.
 
 # Change directory to SD card to prepare for writing files to it
 os.chdir('/sd/log')
@@ -254,9 +384,11 @@ os.chdir('/sd/log')
 #=========================================================================
 # Create SPI object in order to use the spi protocol
 
-# Set baudrate to maximum of 5 MHz
+# Set baudrate to maximum of 5 MHz (see SPI_BAUDRATE)
 # Set polarity and phase as specified by sensor datasheets.
-spi_1 = pyb.SPI(1, pyb.SPI.MASTER, baudrate=5000000, polarity=1, phase=1, bits=8, firstbit=pyb.SPI.MSB)
+# This is the hardware SPI peripheral. Transfers of more than one byte are
+# handled by DMA, so use write_readinto() with preallocated buffers.
+spi_1 = pyb.SPI(1, pyb.SPI.MASTER, baudrate=SPI_BAUDRATE, polarity=1, phase=1, bits=8, firstbit=pyb.SPI.MSB)
 
 
 
@@ -274,7 +406,7 @@ spi_1 = pyb.SPI(1, pyb.SPI.MASTER, baudrate=5000000, polarity=1, phase=1, bits=8
 # *****ADXL375 1 OBJECT*****
 # **************************
 ADXL375_1 = ADXL375(spi_1, SPI1_CS1)
-ADXL375_1.standby() # puts accelerometer in standby mode. this is necessary to configure it
+ADXL375_1.begin_config() # puts accelerometer in standby mode. this is necessary to configure it
 # DATA RATE AND POWER MODE CONTROL
 ADXL375_1.odr(ADXL375_1.ODR_1600HZ) # sets data rate to 1600 HZ
 ADXL375_1.normal_power_mode()
@@ -283,22 +415,78 @@ ADXL375_1.spi_4_wire()
 ADXL375_1.right_justify()
 # SETUP INTERRUPTS
 ADXL375_1.int_disable(ADXL375_1.Watermark_enable) # Make sure interrupts are disabled before configuring as per datasheet
-ADXL375_1.FIFO_Mode_FIFO() # Configures the FIFO buffer to operate in FIFO mode
+ADXL375_1.FIFO_Mode_Stream() # Configures the FIFO buffer to operate in stream mode (keeps collecting data, oldest samples are dropped if it overflows)
 ADXL375_1.trigger_int1() # Configures the interrupt to pin INT1
 ADXL375_1.interrupt_active_high() # Configures the interrupt to be active high
 ADXL375_1.set_samples(FIFO_BUFF_COUNT) # Sets the number of samples before the watermark bit is set
+ADXL375_1.end_config() # Writes the settings above to the accelerometer
 
 # **************************
 # *****ADXL375 2 OBJECT*****'
 # **************************
 ADXL375_2 = ADXL375(spi_1, SPI1_CS2)
-ADXL375_2.standby() # Puts accelerometer in standby mode. this is necessary to configure it
+ADXL375_2.begin_config() # Puts accelerometer in standby mode. this is necessary to configure it
 # DATA RATE AND POWER MODE CONTROL
 ADXL375_2.odr(ADXL375_2.ODR_1600HZ) # Sets data rate to 1600 HZ
 ADXL375_2.normal_power_mode()
 # DATA FORMAT
 ADXL375_2.spi_4_wire()
 ADXL375_2.right_justify()
+# SETUP FIFO BUFFER
+# ADXL375_2 is read every time ADXL375_1 generates an interrupt. Its FIFO
+# buffer holds the samples taken in the meantime so that both accelerometers
+# record at the full data rate.
+ADXL375_2.FIFO_Mode_Stream() # Configures the FIFO buffer to operate in stream mode
+ADXL375_2.end_config() # Writes the settings above to the accelerometer
+
+
+
+
+
+
+
+
+
+
+#=========================================================================
+# CREATE INTERRUPT OBJECTS
+#=========================================================================
+# The rising edge of the ADXL375_1 watermark interrupt (INT1) drains both
+# FIFO buffers into the drain buffer given by fill_index and hands it to
+# the record loop. The record loop hands each drain buffer back before it
+# writes to the SD card, so the callback can drain again while a write is
+# in progress. Note that the SD card driver masks this interrupt while a
+# block is being transferred, so the callback only runs between transfers.
+# During a long transfer the samples wait in the FIFO buffer; the slack is
+# the 12 entries above the watermark (7.5 msec at 1600Hz). The callback
+# runs as a hard interrupt, so it must not allocate memory.
+# INT1 only has a rising edge again once the FIFO buffer is below the
+# watermark, so the callback keeps draining while INT1 is high. If the
+# record loop hasn't written the next drain buffer yet, the callback
+# returns and the record loop calls it again with swint() once the buffer
+# is written. The samples wait in the FIFO buffer in the meantime.
+# The interrupt is created after the SPI bus and both accelerometers,
+# because the callback uses them.
+def ADXL1_INT1_callback(line):
+    global fill_index
+    while ADXL1_INT1.value():
+        if drain_ready[fill_index]: # Record loop is still writing this buffer
+            return
+        drain_both_fifos(spi_1, CMD_RD, CS_REGS, buf1_slots[fill_index], buf2_slots[fill_index], FIFO_BUFF_COUNT) # Read all samples of ADXL375_1 and ADXL375_2
+        drain_ready[fill_index] = 1 # Hand the buffer to the record loop
+        fill_index ^= 1
+
+ADXL1_INT1_IRQ          = pyb.ExtInt(ADXL1_INT1, pyb.ExtInt.IRQ_RISING, pyb.Pin.PULL_DOWN, ADXL1_INT1_callback)
+ADXL1_INT1_IRQ.disable() # Only enabled while recording. The SPI bus is used by the main program otherwise
+
+# Both edges of the record button wake the microcontroller up from
+# pyb.wfi() while it waits for the user to press or let go of the button.
+# The wait loops check the pin again after waking up, so a bouncing
+# contact only costs an extra pass through the loop.
+def REC_BTN_callback(line):
+    pass
+
+REC_BTN_IRQ             = pyb.ExtInt(REC_BTN, pyb.ExtInt.IRQ_RISING_FALLING, pyb.Pin.PULL_NONE, REC_BTN_callback)
 
 
 
@@ -315,10 +503,22 @@ ADXL375_2.right_justify()
 print('GET FILE COUNT')
 print()
 
-countFile = open('/sd/count/count.txt', 'r')
-last_line = int(countFile.readlines()[-1])
-file_count = last_line
-countFile.close()
+# count.txt only holds the current file count, which is replaced at the
+# start of every recording, so reading it takes the same time no matter how
+# many recordings there are. Older versions added a line for every
+# recording. The last line of those files is the count, and they are
+# shortened to one line by the next recording.
+# The new count is written to count.tmp first, which is then renamed to
+# count.txt. If power is lost in between, count.tmp holds the newest count.
+# If neither file holds a number, the highest recording number on the SD
+# card is used so that no recording is overwritten.
+file_count = read_file_count('/sd/count/count.txt')
+tmp_count = read_file_count('/sd/count/count.tmp')
+if tmp_count is not None and (file_count is None or tmp_count > file_count):
+    file_count = tmp_count
+if file_count is None:
+    print('ERROR: COUNT FILE HOLDS NO NUMBER')
+    file_count = highest_file_number('.')
 
 
 
@@ -361,9 +561,9 @@ while True:
     print()
 
     while REC_BTN.value() == True: # Wait for user to press button
-        pass
+        pyb.wfi() # Wakes up on the REC_BTN interrupt
     while REC_BTN.value() == False: # Wait for user to let go of button
-        pass
+        pyb.wfi() # Wakes up on the REC_BTN interrupt
 
 
 
@@ -384,9 +584,14 @@ while True:
     REC_LED.value(0)
     # Increment file count and save to count file
     file_count += 1 # Increment file count
-    countFile = open('/sd/count/count.txt', 'a')
+    countFile = open('/sd/count/count.tmp', 'w') # Write the new count next to the old one
     countFile.write(str(file_count) + "\n")
     countFile.close()
+    try:
+        os.remove('/sd/count/count.txt') # The file system can't rename over an existing file
+    except OSError:
+        pass
+    os.rename('/sd/count/count.tmp', '/sd/count/count.txt')
 
     # Update the display
     Display.text('    ') # Clears current text/numbers on display
@@ -394,10 +599,11 @@ while True:
     Display.blink_rate(0)
     Display.show() # Updates the display
 
-    # Clear the accelerometer buffer. Make sure it is in standby mode first
+    # Clear the accelerometer buffers. Make sure they are in standby mode first
     ADXL375_1.standby()
     clear_accel_buf(ADXL375_1)
     ADXL375_2.standby()
+    clear_accel_buf(ADXL375_2)
 
     # Create the data file.
     file = open('data' + str(file_count) +'.bin', 'wb')
@@ -414,21 +620,71 @@ while True:
     #=========================================================================
     # RECORDING!
     #=========================================================================
+    # A garbage collection can take several msec, which is longer than the
+    # FIFO buffer can cover. Collect now and keep the collector off while
+    # recording. All buffers used in the record loop are allocated up front
+    # (see DEFINE BUFFERS), so nothing is allocated there.
+    # The functions the record loop calls are bound to names first, so the
+    # loop doesn't have to look them up as attributes on every pass. Binding
+    # a method allocates, so this is done before the collector is disabled.
+    rec_btn_value   = REC_BTN.value
+    int1_value      = ADXL1_INT1.value
+    int1_swint      = ADXL1_INT1_IRQ.swint
+    file_write      = file.write
+    wfi             = pyb.wfi
+    gc.collect()
+    gc.disable()
+
+    # Start with empty drain buffers
+    drain_ready[0] = 0
+    drain_ready[1] = 0
+    fill_index = 0
+    write_index = 0
+    sd_pos = 0
+
     # Enable interrupts and start measuring!
     ADXL375_1.int_enable(ADXL375_1.Watermark_enable)
+    ADXL1_INT1_IRQ.enable()
     ADXL375_1.measure()
     ADXL375_2.measure()
 
-    while REC_BTN.value() == True: # Wait for user to press button
-        while ADXL1_INT1.value() == False: # If the INT1 pin is low, wait for accelerometer to collect more data
-            pass
-        for i in range(FIFO_BUFF_COUNT): # Store values onto SD card in 'log.bin' file
-            SPI1_CS1.low(); spi_1.send_recv(CMD_RD, buf1_7); SPI1_CS1.high() # Read ADXL375_1
-            SPI1_CS2.low(); spi_1.send_recv(CMD_RD, buf2_7); SPI1_CS2.high() # Read ADXL375_2
-            file.write(buf1_7) # Write data to log.bin
-            file.write(buf2_7) # Write data to log.bin
+    # If the callback raises an exception, MicroPython disables the interrupt
+    # and the FIFO buffers are no longer drained. This shows as INT1 being
+    # high with no drain buffer ready, even right after swint() ran the
+    # callback. Recording stops in that case instead of carrying on with a
+    # data file that is missing samples.
+    stalled = False
+
+    while rec_btn_value() == True: # Wait for user to press button
+        if drain_ready[write_index]: # The interrupt filled the next drain buffer
+            last_pos = sd_pos
+            sd_pos = ring_copy(sd_buf, sd_pos, drain_bufs[write_index], DRAIN_BYTES)
+            drain_ready[write_index] = 0 # Hand the drain buffer back to the interrupt
+            write_index ^= 1
+            if int1_value(): # Interrupt had to wait for this buffer, run it again
+                int1_swint()
+            if (last_pos ^ sd_pos) & _SD_BLOCK: # Moved on to the other half, so this half is full
+                file_write(sd_halves[last_pos // _SD_BLOCK]) # Store values onto SD card in the data file ('data<file_count>.bin')
+        elif int1_value(): # FIFO buffer above the watermark, but nothing was drained
+            int1_swint()
+            if int1_value() and not drain_ready[write_index]: # The callback didn't drain either
+                stalled = True
+                break
+        else:
+            wfi() # Wakes up on the INT1 interrupt (or at the latest on the next 1 ms system tick)
+    ADXL1_INT1_IRQ.disable()
+    while drain_ready[write_index]: # Store the drain buffers that are still full
+        last_pos = sd_pos
+        sd_pos = ring_copy(sd_buf, sd_pos, drain_bufs[write_index], DRAIN_BYTES)
+        drain_ready[write_index] = 0
+        write_index ^= 1
+        if (last_pos ^ sd_pos) & _SD_BLOCK:
+            file_write(sd_halves[last_pos // _SD_BLOCK])
+    gc.enable() # Turn the garbage collector back on and clean up after recording
+    gc.collect()
+    file_write(sd_halves[sd_pos // _SD_BLOCK][:sd_pos % _SD_BLOCK]) # Store the rest of the half that isn't full
     while REC_BTN.value() == False: # Wait for user to let go of button
-        pass
+        pyb.wfi() # Wakes up on the REC_BTN interrupt
 
 
 
@@ -448,6 +704,12 @@ while True:
     # Close data file
     file.close()
 
+    # Keep the data of a stalled recording, but mark the file so it isn't
+    # mistaken for a complete recording.
+    if stalled:
+        print('ERROR: FIFO BUFFERS STOPPED BEING READ')
+        os.rename('data' + str(file_count) + '.bin', 'data' + str(file_count) + '.err')
+
     # Turn off accelerometer
     ADXL375_1.standby()
     ADXL375_2.standby()
@@ -459,8 +721,12 @@ while True:
     print()
 
     Display.text('    ') # Clears current text/numbers on display
-    Display.number(file_count) # Prints the desired number
-    Display.blink_rate(0)
+    if stalled:
+        Display.text('ERR ') # Blinks until the next recording
+        Display.blink_rate(2)
+    else:
+        Display.number(file_count) # Prints the desired number
+        Display.blink_rate(0)
     Display.show() # Updates the display
 
 